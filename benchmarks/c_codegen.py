@@ -0,0 +1,34 @@
+import sys
+import time
+import numpy as np
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.primitives.minimal_surfaces import lidinoid
+from dendrite.transformations.affine import translate
+
+# Time of evaluating a grid with generated NumPy code versus the compiled C kernel, at increasing resolutions.
+# Usage: python -m benchmarks.c_codegen [max_resolution]
+
+functional = (sphere(1) | (torus(1, 0.3) << translate(0.5, 0, 0))) & lidinoid()
+bounds = [[-2, -2, -2], [2, 2, 2]]
+
+def benchmark(n):
+  start = time.time()
+  functional(*np.mgrid[-2:2:n*1j, -2:2:n*1j, -2:2:n*1j])
+  vectorized = time.time() - start
+
+  start = time.time()
+  functional.compiled_c.grid((n, n, n), bounds)
+  native = time.time() - start
+  return vectorized, native
+
+if __name__ == "__main__":
+  max_resolution = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+  start = time.time()
+  functional.compiled_c
+  print("Compiled in %.3fs" % (time.time() - start))
+  print("%8s %14s %14s %12s" % ("n", "numpy (s)", "c (s)", "speedup"))
+  n = 25
+  while n <= max_resolution:
+    vectorized, native = benchmark(n)
+    print("%8d %14.4f %14.4f %12.1f" % (n, vectorized, native, vectorized / native))
+    n *= 2
@@ -0,0 +1,31 @@
+import sys
+import time
+import subprocess
+
+# Time to import the core algebra and build a primitive in a fresh interpreter, which must not pay for TensorFlow.
+# Usage: python -m benchmarks.import_time [budget_seconds]
+# Exits with a non-zero status if the budget is exceeded or TensorFlow was imported.
+
+program = """
+import sys
+import time
+start = time.time()
+from dendrite.geometry.primitives.quadrics import sphere
+from dendrite.transformations.affine import translate
+import dendrite.calculation.volumetric
+import dendrite.calculation.raytracer
+geometry = sphere(1) << translate(1, 0, 0)
+print(time.time() - start, "tensorflow" in sys.modules)
+"""
+
+def benchmark():
+  output = subprocess.check_output([sys.executable, "-c", program])
+  elapsed, tensorflow_imported = output.decode("utf-8").split()
+  return float(elapsed), tensorflow_imported == "True"
+
+if __name__ == "__main__":
+  budget = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+  elapsed, tensorflow_imported = benchmark()
+  print("import (s): %.4f, budget (s): %.4f, tensorflow imported: %s" % (elapsed, budget, tensorflow_imported))
+  if elapsed > budget or tensorflow_imported:
+    sys.exit(1)
@@ -0,0 +1,32 @@
+import sys
+import time
+import numpy as np
+from dendrite.calculation.octree import Octree
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.affine import translate
+
+# Evaluations and time of adaptive octree sampling versus dense sampling, at increasing resolutions.
+# Usage: python -m benchmarks.octree [max_resolution]
+
+functional = sphere(1) | (torus(1, 0.3) << translate(0.5, 0, 0))
+bounds = [[-2, -2, -2], [2, 2, 2]]
+
+def benchmark(n):
+  start = time.time()
+  octree = Octree(functional, (n, n, n), bounds)
+  octree.run()
+  adaptive = time.time() - start
+
+  start = time.time()
+  functional(*np.mgrid[-2:2:n*1j, -2:2:n*1j, -2:2:n*1j])
+  dense = time.time() - start
+  return octree.evaluations, adaptive, dense
+
+if __name__ == "__main__":
+  max_resolution = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+  print("%8s %12s %12s %14s %14s" % ("n", "evaluations", "reduction", "adaptive (s)", "dense (s)"))
+  n = 25
+  while n <= max_resolution:
+    evaluations, adaptive, dense = benchmark(n)
+    print("%8d %12d %12.1f %14.4f %14.4f" % (n, evaluations, n**3 / evaluations, adaptive, dense))
+    n *= 2
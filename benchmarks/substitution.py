@@ -0,0 +1,29 @@
+import sys
+import time
+from functools import reduce
+from dendrite.geometry.primitives.quadrics import sphere
+from dendrite.transformations.affine import translate
+
+# Construction and flattening time of unions of n translated spheres, versus the number of Operad nodes.
+# Usage: python -m benchmarks.substitution [max_spheres]
+
+def spheres(n):
+  return [sphere(0.1 + i/n) << translate(i, 0, 0) for i in range(n)]
+
+def benchmark(n):
+  start = time.time()
+  union = reduce(lambda a, b: a | b, spheres(n))
+  constructed = time.time()
+  memo = {}
+  union.substitute_symbols(memo)
+  flattened = time.time()
+  return len(memo), constructed - start, flattened - constructed
+
+if __name__ == "__main__":
+  max_spheres = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+  print("%8s %14s %14s" % ("nodes", "construct (s)", "flatten (s)"))
+  n = 4
+  while n <= max_spheres:
+    nodes, construct, flatten = benchmark(n)
+    print("%8d %14.4f %14.4f" % (nodes, construct, flatten))
+    n *= 2
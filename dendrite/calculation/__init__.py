@@ -1 +1 @@
-__all__=["graph", "raytracer", "volumetric"]
+__all__=["graph", "raytracer", "volumetric", "numpy_raytracer", "animation", "sweep"]
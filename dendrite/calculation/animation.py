@@ -0,0 +1,126 @@
+import queue
+import threading
+import numpy as np
+
+# Cameras generate rays on the CPU, which raytracers take as runtime inputs, so every frame of an animation
+# reuses the same compiled graph. Frames are encoded and written by a background thread while the next is traced.
+
+def normalize(vector):
+  return vector / np.linalg.norm(vector)
+
+class Camera:
+  def __init__(self, position=(-0.9,-0.1,-0.1), look_at=(0,0,-0.1), up=(0,0,1), fov=90, light=(0,1,1), light_color=(255,255,255)):
+    self.position = np.array(position, dtype=np.float64)
+    self.look_at = np.array(look_at, dtype=np.float64)
+    self.up = np.array(up, dtype=np.float64)
+    # Vertical field of view in degrees, the image plane spans [-1, 1] vertically at the focal length
+    self.fov = fov
+    self.light = {"position": np.array(light, dtype=np.float64), "color": np.array(light_color, dtype=np.float64)}
+
+  @property
+  def focal_length(self):
+    return 1 / np.tan(np.radians(self.fov) / 2)
+
+  def basis(self):
+    forward = normalize(self.look_at - self.position)
+    right = normalize(np.cross(forward, self.up))
+    return forward, right, np.cross(right, forward)
+
+  def rays(self, resolution, tile=None):
+    """Origins on the image plane and unit directions of shape (3, w, h), for the pixels of tile if given."""
+    aspect_ratio = resolution[0]/resolution[1]
+    if tile is None:
+      tile = (slice(None), slice(None))
+    u = np.linspace(-aspect_ratio, aspect_ratio, resolution[0])[tile[0]]
+    v = np.linspace(-1, 1, resolution[1])[tile[1]]
+    U, V = np.meshgrid(u, v, indexing="ij")
+
+    # The image plane is centered on the camera position, with rows running down the image
+    forward, right, up = self.basis()
+    expand = lambda vector: vector[:, None, None]
+    image_plane = expand(self.position) + U * expand(right) - V * expand(up)
+    eye = self.position - self.focal_length * forward
+    directions = image_plane - expand(eye)
+    return image_plane, directions / np.linalg.norm(directions, axis=0, keepdims=True)
+
+def minimum_filter(image, radius=1):
+  padded = np.pad(image, radius, mode="edge")
+  width, height = image.shape
+  shifted = [padded[i:i+width, j:j+height] for i in range(2*radius+1) for j in range(2*radius+1)]
+  return np.minimum.reduce(shifted)
+
+def warm_start_depth(previous_camera, depth, hit, camera, resolution, back_off=0.1):
+  """Initial distances along the rays of camera, reprojecting the surface points hit in the previous frame.
+
+  Every pixel starts at the nearest reprojected point over its neighbourhood, backed off by a fraction of its
+  distance, so rays start short of the surface rather than past it. Pixels no point reprojects to start at zero.
+  """
+  origins, directions = previous_camera.rays(resolution)
+  points = (origins + directions * depth)[:, hit]
+
+  # Project the points through the eye of the new camera onto its image plane
+  forward, right, up = camera.basis()
+  eye = camera.position - camera.focal_length * forward
+  offsets = points - eye[:, None]
+  ahead = np.dot(forward, offsets)
+  visible = ahead > camera.focal_length
+  offsets, ahead = offsets[:, visible], ahead[visible]
+  u = np.dot(right, offsets) * camera.focal_length / ahead
+  v = -np.dot(up, offsets) * camera.focal_length / ahead
+
+  aspect_ratio = resolution[0]/resolution[1]
+  i = np.rint((u + aspect_ratio) / (2*aspect_ratio) * (resolution[0] - 1)).astype(np.int64)
+  j = np.rint((v + 1) / 2 * (resolution[1] - 1)).astype(np.int64)
+  inside = (i >= 0) & (i < resolution[0]) & (j >= 0) & (j < resolution[1])
+
+  # Distance from the image plane to each point, along the ray through it
+  distances = np.linalg.norm(offsets, axis=0) * (1 - camera.focal_length / ahead)
+
+  initial = np.full(tuple(resolution), np.inf)
+  np.minimum.at(initial, (i[inside], j[inside]), distances[inside])
+  initial = minimum_filter(initial)
+  initial[~np.isfinite(initial)] = 0
+  return np.maximum(initial * (1 - back_off), 0)
+
+def turntable(frames, radius=1, height=0, look_at=(0,0,0), **settings):
+  """Cameras orbiting look_at about the z axis, one per frame."""
+  look_at = np.array(look_at, dtype=np.float64)
+  for angle in np.linspace(0, 2*np.pi, frames, endpoint=False):
+    position = look_at + [radius*np.cos(angle), radius*np.sin(angle), height]
+    yield Camera(position, look_at, **settings)
+
+class FrameWriter:
+  """Writes images on a background thread, so encoding overlaps tracing the next frame."""
+  def __init__(self, maxsize=4):
+    self.frames = queue.Queue(maxsize)
+    self.error = None
+    self.thread = threading.Thread(target=self.work, daemon=True)
+    self.thread.start()
+
+  def work(self):
+    from skimage import io
+
+    while True:
+      item = self.frames.get()
+      if item is None:
+        return
+      path, image = item
+      try:
+        io.imsave(path, image, check_contrast=False)
+      except Exception as error:
+        self.error = error
+
+  def write(self, path, image):
+    self.frames.put((path, image))
+
+  def close(self):
+    self.frames.put(None)
+    self.thread.join()
+    if self.error is not None:
+      raise self.error
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
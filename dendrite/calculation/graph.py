@@ -1,5 +1,4 @@
 import numpy as np
-import tensorflow as tf
 from contextlib import contextmanager
 from time import strftime
 
@@ -12,6 +11,8 @@ class Graph:
 
   @contextmanager
   def tensorboard_logging(self, tag_prefix):
+    import tensorflow as tf
+
     try:
       if self.debug:
         self.summary_writer = tf.train.SummaryWriter("log/Run-" + strftime("%d-%m_%H-%M-%S"), self.session.graph)
@@ -24,6 +25,8 @@ class Graph:
       self.run_step = 0
 
   def run(self, ops, feed={}):
+    import tensorflow as tf
+
     feed_dict = self.merge_feeds(feed)
 
     if self.summary_writer is not None:
@@ -42,6 +45,13 @@ class Graph:
 
     return result
 
+  def set_parameters(self, **parameters):
+    """Updates parameters of the geometry, fed to the graph on every run without rebuilding it."""
+    for name in parameters:
+      if name not in self.geometry.placeholders:
+        raise ValueError("Not a placeholder of the graph, it must be rebuilt to change: " + name)
+    self.geometry.set_parameters(**parameters)
+
   def run_summary(self, summary_op, feed):
     if self.summary_writer is not None:
       feed_dict = self.merge_feeds(feed)
@@ -56,6 +66,8 @@ class Graph:
     return feed_dict
 
   def initialize_session(self):
+    import tensorflow as tf
+
     # http://stackoverflow.com/questions/35905830/can-tensorflow-cache-sub-graph-computations
     optimizer_opts = tf.OptimizerOptions(opt_level=tf.OptimizerOptions.L1)
     graph_opts = tf.GraphOptions(optimizer_options=optimizer_opts)
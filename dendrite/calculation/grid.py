@@ -0,0 +1,24 @@
+import numpy as np
+from itertools import product
+
+# Calculations sample the same grid as np.mgrid with complex steps, addressed by integer indices so that it can be
+# evaluated piecewise, in chunks or cells, without materializing the full coordinate arrays.
+
+def grid_coordinates(indices, coordinate_shape, bounds):
+  min_bounds, max_bounds = np.array(bounds[0], dtype=np.float64), np.array(bounds[1], dtype=np.float64)
+  steps = (max_bounds - min_bounds) / np.maximum(np.array(coordinate_shape) - 1, 1)
+  expand = (slice(None),) + (None,) * (np.ndim(indices) - 1)
+  return min_bounds[expand] + indices * steps[expand]
+
+def chunk_slices(coordinate_shape, chunk_shape):
+  # Bricks of chunk_shape covering the grid in C order, bricks along the far edges are truncated
+  starts = [range(0, n, c) for n, c in zip(coordinate_shape, chunk_shape)]
+  for start in product(*starts):
+    yield tuple([slice(s, min(s + c, n)) for s, c, n in zip(start, chunk_shape, coordinate_shape)])
+
+def chunk_indices(chunk, shape=None):
+  # Grid indices of the samples of a chunk, padded out to shape by repeating the last sample along each axis
+  ranges = [np.arange(s.start, s.stop) for s in chunk]
+  if shape is not None:
+    ranges = [np.minimum(np.arange(s.start, s.start + n), s.stop - 1) for s, n in zip(chunk, shape)]
+  return np.array(np.meshgrid(*ranges, indexing="ij"))
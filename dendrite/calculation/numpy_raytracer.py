@@ -0,0 +1,147 @@
+import numpy as np
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from dendrite.core.functional import Functional
+from dendrite.core.geometry import Geometry
+from dendrite.core.lipschitz import step_bound, default_bounds
+from dendrite.calculation.grid import chunk_slices
+from dendrite.codegen.numpy_codegen import CompiledFunctional
+from dendrite.calculation.animation import Camera, FrameWriter, warm_start_depth
+
+# Sphere tracing on the CPU with NumPy. Only the rays which are still marching are evaluated each step: their
+# indices are kept in a compacted array, and rays are retired as soon as they hit the surface or escape,
+# so late steps cost in proportion to the unresolved rays rather than the whole frame.
+# Frames are rendered in independent screen tiles, so memory depends on the tile size rather than the resolution.
+
+def normalize(vectors, axis=0):
+  lengths = np.linalg.norm(vectors, axis=axis, keepdims=True)
+  return vectors / np.where(lengths > 0, lengths, 1)
+
+def colormix(a, b, factor=0.5):
+  return a*(1-factor) + b*(factor)
+
+def render_tile(raytracer, camera, tile, initial):
+  return raytracer.render_tile(camera, tile, initial)
+
+class NumPyRaytracer:
+  def __init__(self, geometry, resolution=(1920,1080), epsilon=0.0001, clip_length=100, max_steps=256, bounds=default_bounds, strict=False):
+    if isinstance(geometry, Geometry):
+      functional = geometry.numeric_functional
+    elif isinstance(geometry, Functional):
+      functional = geometry
+    else:
+      raise ValueError("Can't evaluate instance of %s" % type(geometry))
+
+    self.geometry = geometry
+    self.functional = functional
+    # Without a known Lipschitz bound one is estimated within bounds, unless strict
+    self.bounds = bounds
+    self.strict = strict
+    self.lipschitz = step_bound(functional, bounds, strict)
+    self.resolution = resolution
+    self.epsilon = epsilon
+    self.clip_length = clip_length
+    self.max_steps = max_steps
+    self.ambient_light = {"color": np.array([119, 139, 165])}
+    self.sky_color = np.array([70, 130, 180])
+    self.steps = 0
+    self.evaluations = 0
+
+  def __getstate__(self):
+    # Workers receive the generated NumPy source rather than the Operad tree
+    state = self.__dict__.copy()
+    state["geometry"] = None
+    state["functional"] = CompiledFunctional(self.functional.numpy_source, self.functional.gradient_source)
+    return state
+
+  def set_parameters(self, **parameters):
+    """Changes parameters of the geometry for following frames, reusing the compiled functional."""
+    if not isinstance(self.geometry, Geometry):
+      raise ValueError("Only Geometry parameters can be set, not those of %s" % type(self.geometry))
+    self.geometry.set_parameters(**parameters)
+    self.functional = self.geometry.numeric_functional
+    self.lipschitz = step_bound(self.functional, self.bounds, self.strict)
+
+  def trace(self, origins, directions, initial=None):
+    """Marches flattened rays of shape (3, n) from the initial distances along them (zero by default), returning
+    the distances along each ray and a mask of rays which hit the surface."""
+    t = np.zeros(origins.shape[1]) if initial is None else np.array(initial, dtype=np.float64)
+    hit = np.zeros(origins.shape[1], dtype=bool)
+    active = np.arange(origins.shape[1])
+
+    step = 0
+    while len(active) and (self.max_steps is None or step < self.max_steps):
+      X, Y, Z = origins[:, active] + directions[:, active] * t[active]
+      values = self.functional(X, Y, Z)
+      self.evaluations += len(active)
+      distance = np.abs(values)
+
+      converged = distance < self.epsilon
+      hit[active[converged]] = True
+      t[active] -= np.sign(values) * np.maximum(distance, self.epsilon) / self.lipschitz * ~converged
+
+      # Retire rays on the surface and rays past the clip length, in either direction as rays starting inside the
+      # solid march backwards
+      escaped = np.abs(t[active]) > self.clip_length
+      active = active[~(converged | escaped)]
+      step += 1
+
+    self.steps += step
+    return t, hit
+
+  def shade(self, points, light):
+    # Note this is strictly the negative normal vector, as grad(F) points inward
+    normal_vector = normalize(self.functional.gradient(*points))
+    incidence = normalize(normal_vector - light["position"][:, None])
+    incidence_angle = np.maximum(np.sum(incidence * normal_vector, axis=0), 0)
+    light_intensity = light["color"][:, None] * incidence_angle
+    return colormix(light_intensity, self.ambient_light["color"][:, None])
+
+  def render_tile(self, camera, tile, initial=None):
+    origins, directions = camera.rays(self.resolution, tile)
+    shape = origins.shape
+    origins, directions = origins.reshape(3, -1), directions.reshape(3, -1)
+    t, hit = self.trace(origins, directions, None if initial is None else initial.reshape(-1))
+
+    pixels = np.tile(self.sky_color[:, None], (1, origins.shape[1])).astype(np.float64)
+    points = origins[:, hit] + directions[:, hit] * t[hit]
+    pixels[:, hit] = self.shade(points, camera.light)
+    return np.clip(pixels, 0, 255).astype(np.uint8).reshape(shape), t.reshape(shape[1:]), hit.reshape(shape[1:])
+
+  def render(self, camera=None, tile_shape=None, workers=None, initial=None):
+    """Renders an image of shape (h, w, 3) as uint8 seen from camera, tracing tiles of tile_shape pixels (the whole
+    frame by default) independently, in a pool of workers processes if given. Rays start at the initial distances,
+    of shape (w, h), if given. The distances and hits of the frame are kept as self.depth and self.hit."""
+    camera = camera or Camera()
+    image = np.empty((3,) + tuple(self.resolution), dtype=np.uint8)
+    self.depth = np.empty(tuple(self.resolution))
+    self.hit = np.empty(tuple(self.resolution), dtype=bool)
+    tiles = list(chunk_slices(self.resolution, tile_shape or self.resolution))
+    initials = [None if initial is None else initial[tile] for tile in tiles]
+
+    def assemble(rendered):
+      for tile, (pixels, depth, hit) in zip(tiles, rendered):
+        image[(slice(None),) + tile] = pixels
+        self.depth[tile] = depth
+        self.hit[tile] = hit
+
+    if workers is None:
+      assemble(map(self.render_tile, repeat(camera), tiles, initials))
+    else:
+      with ProcessPoolExecutor(workers) as executor:
+        assemble(executor.map(render_tile, repeat(self), repeat(camera), tiles, initials))
+    return np.transpose(image)
+
+  def run(self, frames=1, folder="output", cameras=None, warm_start=False, back_off=0.1):
+    print("Running: NumPyRaytracer")
+    cameras = list(cameras) if cameras is not None else [Camera()] * frames
+    previous = None
+    with FrameWriter() as writer:
+      for frame, camera in enumerate(cameras):
+        print("Frame: " + str(frame))
+        initial = None
+        if warm_start and previous is not None:
+          # Start from the previous frame's surface reprojected into this frame
+          initial = warm_start_depth(previous, self.depth, self.hit, camera, self.resolution, back_off)
+        writer.write(folder+"/Raytraced"+str(frame)+".png", self.render(camera, initial=initial))
+        previous = camera
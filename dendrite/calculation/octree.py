@@ -0,0 +1,76 @@
+import numpy as np
+from dendrite.mathematics.interval import box
+from dendrite.calculation.grid import grid_coordinates
+
+# Adaptive sampling of a functional over the same grid as np.mgrid with complex steps.
+# Cells are inclusive ranges of grid indices, so neighbouring cells share their boundary samples and every grid edge
+# lies within a single cell. Cells whose interval bounds exclude zero can not contain the surface, they are filled
+# with the bound nearest zero instead of being sampled, only the remaining leaf cells are evaluated sample by sample.
+
+def split(lower, upper, leaf_size):
+  # Halve every axis longer than leaf_size, children share the middle plane of samples
+  for axis in range(3):
+    extent = upper[:, axis] - lower[:, axis]
+    splitting = extent > leaf_size
+    middle = (lower[:, axis] + upper[:, axis]) // 2
+    low_upper, high_lower = upper.copy(), lower.copy()
+    low_upper[splitting, axis] = middle[splitting]
+    high_lower[splitting, axis] = middle[splitting]
+    lower = np.concatenate([lower, high_lower[splitting]])
+    upper = np.concatenate([low_upper, upper[splitting]])
+  return lower, upper
+
+class Octree:
+  def __init__(self, functional, coordinate_shape, bounds, leaf_size=4):
+    self.functional = functional
+    self.coordinate_shape = tuple(coordinate_shape)
+    self.bounds = bounds
+    self.leaf_size = leaf_size
+    self.evaluations = 0
+
+  def cell_bounds(self, lower, upper):
+    try:
+      return self.functional.interval(*box(
+        grid_coordinates(lower.T, self.coordinate_shape, self.bounds),
+        grid_coordinates(upper.T, self.coordinate_shape, self.bounds)
+      ))
+    except NotImplementedError:
+      # Without interval rules for some node no cell can be culled, which degrades to dense sampling
+      return None
+
+  def run(self):
+    """Samples the functional on the grid, returning a dense array with exact values in every cell containing the
+    surface and the bound nearest zero elsewhere. Leaf samples are kept as self.indices and self.values."""
+    grid = np.empty(self.coordinate_shape, dtype=np.float32)
+    sampled = np.zeros(self.coordinate_shape, dtype=bool)
+
+    lower = np.zeros((1, 3), dtype=np.int64)
+    upper = np.array([self.coordinate_shape], dtype=np.int64) - 1
+    leaves = []
+    while len(lower):
+      bounds = self.cell_bounds(lower, upper)
+      if bounds is not None:
+        culled = np.logical_or(bounds.lo > 0, bounds.hi < 0)
+        fill = np.where(bounds.lo > 0, bounds.lo, bounds.hi).astype(np.float32)
+        for l, u, value in zip(lower[culled], upper[culled], fill[culled]):
+          grid[l[0]:u[0]+1, l[1]:u[1]+1, l[2]:u[2]+1] = value
+        lower, upper = lower[~culled], upper[~culled]
+
+      is_leaf = np.all(upper - lower <= self.leaf_size, axis=1)
+      leaves.append((lower[is_leaf], upper[is_leaf]))
+      lower, upper = split(lower[~is_leaf], upper[~is_leaf], self.leaf_size)
+
+    # Mark every sample of every leaf, offsets past the end of smaller leaves are clamped onto their last sample
+    offsets = np.stack(np.meshgrid(*[np.arange(self.leaf_size + 1)]*3, indexing="ij")).reshape(3, -1)
+    for lower, upper in leaves:
+      for l, u in zip(np.array_split(lower, max(1, len(lower) // 4096)), np.array_split(upper, max(1, len(upper) // 4096))):
+        if len(l):
+          indices = np.minimum(l[:, :, None] + offsets[None], u[:, :, None])
+          sampled[indices[:, 0], indices[:, 1], indices[:, 2]] = True
+
+    self.indices = np.array(np.nonzero(sampled))
+    X, Y, Z = grid_coordinates(self.indices, self.coordinate_shape, self.bounds)
+    self.values = np.asarray(self.functional(X, Y, Z), dtype=np.float32)
+    self.evaluations = self.values.size
+    grid[sampled] = self.values
+    return grid
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dendrite.codegen.numpy_codegen import compile_numpy
+from dendrite.calculation.grid import grid_coordinates, chunk_slices, chunk_indices
+
+# Tiles of the grid are evaluated by a pool of processes. Workers receive the generated NumPy source of the functional
+# rather than the Operad tree, so nothing but a string is serialized and workers never flatten or import TensorFlow.
+# Every worker writes its tiles straight into a memory mapped .npy file, which the parent process then maps.
+
+worker = {}
+
+def initialize_worker(source, coordinate_shape, bounds, path):
+  worker["functional"] = compile_numpy(source, "operad")
+  worker["coordinate_shape"] = coordinate_shape
+  worker["bounds"] = bounds
+  worker["grid"] = np.load(path, mmap_mode="r+")
+
+def evaluate_tile(chunk):
+  X, Y, Z = np.broadcast_arrays(*grid_coordinates(chunk_indices(chunk), worker["coordinate_shape"], worker["bounds"]))
+  worker["grid"][chunk] = worker["functional"](X, Y, Z)
+  worker["grid"].flush()
+
+def evaluate_parallel(functional, coordinate_shape, bounds, tile_shape=(64, 64, 64), workers=None, path=None):
+  """Evaluates functional on the grid of coordinate_shape spanning bounds, splitting it into tiles evaluated by
+  workers processes (all cores by default). The grid is assembled in the .npy file at path and returned memory
+  mapped, or in memory if no path is given."""
+  coordinate_shape = tuple(coordinate_shape)
+  source = functional.numpy_source
+  in_memory = path is None
+  if in_memory:
+    descriptor, path = tempfile.mkstemp(suffix=".npy")
+    os.close(descriptor)
+
+  try:
+    grid = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=coordinate_shape)
+    del grid
+
+    tiles = list(chunk_slices(coordinate_shape, tile_shape))
+    initargs = (source, coordinate_shape, bounds, path)
+    with ProcessPoolExecutor(workers, initializer=initialize_worker, initargs=initargs) as executor:
+      # Consume the results so exceptions raised in workers propagate
+      list(executor.map(evaluate_tile, tiles))
+
+    grid = np.load(path, mmap_mode="r+")
+    return np.array(grid) if in_memory else grid
+  finally:
+    if in_memory:
+      os.remove(path)
@@ -1,11 +1,17 @@
 import numpy as np
-import tensorflow as tf
 from dendrite.mathematics.metric import *
 from dendrite.core.functional import Functional
+from dendrite.core.geometry import Geometry
+from dendrite.core.lipschitz import step_bound, default_bounds
+from dendrite.utils.tensors import is_tensor
 from dendrite.calculation.graph import Graph
+from dendrite.codegen.glsl_codegen import CodeGenError, CodeGenArgumentListError
+from dendrite.calculation.grid import chunk_slices
+from dendrite.calculation.animation import Camera, FrameWriter, warm_start_depth
 
 def vector_fill(shape, vector):
-  if isinstance(vector, tf.Tensor):
+  if is_tensor(vector):
+    import tensorflow as tf
     with tf.name_scope("VectorFill"):
       return tf.pack([
         tf.fill(shape, vector[0]),
@@ -20,58 +26,50 @@ def vector_fill(shape, vector):
     ])
 
 def normalize_vector(vector):
+  import tensorflow as tf
   with tf.name_scope("Normalize"):
     return vector / norm(vector)
 
 def colormix(a,b,factor=0.5):
+  import tensorflow as tf
   with tf.name_scope("Colormix"):
     return a*(1-factor) + b*(factor)
 
 class Raytracer:
-  def __init__(self, geometry, resolution=(1920,1080), debug=False):
+  def __init__(self, geometry, resolution=(1920,1080), debug=False, tile_shape=(256,256), bounds=default_bounds, strict=False):
+    import tensorflow as tf
+
     if isinstance(geometry, Geometry):
       functional = geometry.functional
+      # Parameters are placeholders in the TensorFlow functional, bound the functional with their values instead
+      numeric_functional = geometry.numeric_functional
     elif isinstance(geometry, Functional):
       functional = geometry
+      numeric_functional = geometry
     else:
       raise ValueError("Can't evaluate instance of %s" % type(geometry))
+    # Without a known Lipschitz bound one is estimated within bounds, unless strict
+    lipschitz = step_bound(numeric_functional, bounds, strict)
 
-    debug_x, debug_y = (240,108)
+    # The graph traces one tile of tile_shape pixels at a time, so memory depends on the tile rather than the resolution
+    tile_shape = tuple([min(t, r) for t, r in zip(tile_shape, resolution)])
+    debug_x, debug_y = (min(240, tile_shape[0]-1), min(108, tile_shape[1]-1))
     placeholders = {}
 
     with tf.name_scope("Camera"):
-      # First coordinates in u,v form
-      aspect_ratio = resolution[0]/resolution[1]
-      min_bounds, max_bounds = (-aspect_ratio, -1), (aspect_ratio, 1)
-      resolutions = list(map(lambda x: x*1j, resolution))
-      image_plane_coords = np.mgrid[min_bounds[0]:max_bounds[0]:resolutions[0],min_bounds[1]:max_bounds[1]:resolutions[1]]
-
-      # Find the center of the image plane
-      camera_position = tf.placeholder(dtype=tf.float32, shape=(3,), name="CameraPosition")
-      placeholders["camera_position"] = camera_position
-
-      lookAt = (0,0,-0.1)
-      camera = camera_position - np.array(lookAt)
-      camera_direction = normalize_vector(camera)
-      focal_length = 1
-      eye = camera + focal_length * camera_direction
-
-      # Coerce into correct shape
-      image_plane_center = vector_fill(resolution, camera_position)
-
-      # Convert u,v parameters to x,y,z coordinates for the image plane
-      v_unit = [0,0,-1]
-      u_unit = tf.cross(camera_direction, v_unit)
-      image_plane = image_plane_center + image_plane_coords[0] * vector_fill(resolution, u_unit) + image_plane_coords[1] * vector_fill(resolution, v_unit)
-
-      # Populate the image plane with initial unit ray vectors
-      initial_vectors = image_plane - vector_fill(resolution, eye)
-      ray_vectors = normalize_vector(initial_vectors)
+      # Rays and light are generated by a Camera and fed every frame, so every frame of an animation reuses this graph
+      image_plane = tf.placeholder(dtype=tf.float32, shape=(3,)+tile_shape, name="Origins")
+      ray_vectors = tf.placeholder(dtype=tf.float32, shape=(3,)+tile_shape, name="Directions")
+      placeholders["origins"] = image_plane
+      placeholders["directions"] = ray_vectors
+      # Distances along the rays to start marching from, zero unless warm starting from the previous frame
+      initial_distances = tf.placeholder(dtype=tf.float32, shape=tile_shape, name="InitialDistances")
+      placeholders["initial_distances"] = initial_distances
 
     with tf.name_scope("SetupSpace"):
       # t is the length along each ray
-      t = tf.Variable(tf.zeros_initializer(resolution, dtype=tf.float32), name="ScalingFactor")
-      reset = t.assign(tf.zeros(resolution, dtype=tf.float32))
+      t = tf.Variable(tf.zeros_initializer(tile_shape, dtype=tf.float32), name="ScalingFactor")
+      reset = t.assign(initial_distances)
       tf.scalar_summary("Debug Vector", t[debug_x, debug_y])
 
       space = (ray_vectors * t) + image_plane
@@ -87,14 +85,26 @@ class Raytracer:
     evaluated_functional = tf.Print(evaluated_functional, [evaluated_functional[debug_x, debug_y]], message="Functional")
 
     with tf.name_scope("Lighting"):
-      light = {"position": np.array([0,1,1]), "color": np.array([255,255,255])}
-      gradient = tf.pack(tf.gradients(evaluated_functional, [x,y,z]))
+      light = {
+        "position": tf.placeholder(dtype=tf.float32, shape=(3,), name="LightPosition"),
+        "color": tf.placeholder(dtype=tf.float32, shape=(3,), name="LightColor")
+      }
+      placeholders["light_position"] = light["position"]
+      placeholders["light_color"] = light["color"]
+      try:
+        numeric_functional.gradient_source
+        # Fed once rays have converged, from the compiled symbolic gradient rather than differentiating the graph
+        gradient = tf.placeholder(dtype=tf.float32, shape=(3,)+tile_shape, name="Gradient")
+        placeholders["gradient"] = gradient
+      except (CodeGenError, CodeGenArgumentListError):
+        # Time dependent functionals have no symbolic gradient, they are differentiated through the graph
+        gradient = tf.pack(tf.gradients(evaluated_functional, [x,y,z]))
       gradient = tf.Print(gradient, [gradient[:,debug_x, debug_y]], message="Grad")
 
       with tf.name_scope("CalculateIncidence"):
         # Note this is strictly the negative normal vector, as grad(F) points inward
         normal_vector = normalize_vector(gradient)
-        incidence = normal_vector - vector_fill(resolution, light["position"])
+        incidence = normal_vector - vector_fill(tile_shape, light["position"])
         normalized_incidence = normalize_vector(incidence)
         incidence_angle = tf.reduce_sum(normalized_incidence * normal_vector, reduction_indices=0)
 
@@ -103,15 +113,15 @@ class Raytracer:
 
       with tf.name_scope("AddLight"):
         # Split the color into three channels
-        light_intensity = vector_fill(resolution, light['color']) * incidence_angle
+        light_intensity = vector_fill(tile_shape, light['color']) * incidence_angle
 
         # Add ambient light + fog
         ambient_light = {"color": np.array([119, 139, 165])}
         sky_color = [70, 130, 180]
-        with_ambient = colormix(light_intensity, vector_fill(resolution, ambient_light["color"]))
+        with_ambient = colormix(light_intensity, vector_fill(tile_shape, ambient_light["color"]))
 
         clip_length = 100
-        with_fog = colormix(with_ambient, vector_fill(resolution, sky_color), (1-tf.exp(-t/clip_length)))
+        with_fog = colormix(with_ambient, vector_fill(tile_shape, sky_color), (1-tf.exp(-t/clip_length)))
         lighted = with_ambient
 
       with tf.name_scope("BooleanMask"):
@@ -119,17 +129,24 @@ class Raytracer:
         epsilon = 0.0001
         bitmask = tf.less_equal(tf.abs(evaluated_functional), epsilon)
         masked = lighted * tf.to_float(bitmask)
-        background = vector_fill(resolution, sky_color) * tf.to_float(tf.logical_not(bitmask))
+        background = vector_fill(tile_shape, sky_color) * tf.to_float(tf.logical_not(bitmask))
         image_data = tf.cast(masked + background, tf.uint8)
 
     with tf.name_scope("RayCasting"):
-      # Criteria for convergence
+      # Fed every frame, as it depends on the parameters of the geometry
+      lipschitz_bound = tf.placeholder(dtype=tf.float32, shape=(), name="Lipschitz")
+      placeholders["lipschitz"] = lipschitz_bound
+
+      # Criteria for convergence, rays past the clip length are retired even where bounded or periodic fields never
+      # grow beyond it
       distance = tf.abs(evaluated_functional)
-      converged = tf.logical_or(tf.greater(distance, clip_length), tf.less(distance, epsilon))
+      escaped = tf.logical_or(tf.greater(distance, clip_length), tf.greater(t, clip_length))
+      converged = tf.logical_or(escaped, tf.less(distance, epsilon))
       tf.scalar_summary("Not Converged", tf.reduce_sum(tf.to_int32(tf.logical_not(converged))))
 
+      # Sphere tracing, no step of |F| / L can cross the surface when L bounds the gradient norm of F
       minimum_step = epsilon
-      distance_step = t - (tf.sign(evaluated_functional) * tf.maximum(distance, minimum_step))
+      distance_step = t - (tf.sign(evaluated_functional) * tf.maximum(distance, minimum_step) / lipschitz_bound)
       distance_step = tf.Print(distance_step, [distance_step[debug_x, debug_y]], message="dist")
       cast_op = t.assign(tf.select(
         converged,
@@ -138,8 +155,8 @@ class Raytracer:
       ))
 
     with tf.name_scope("Render"):
-      image = tf.transpose(image_data)
-      render = tf.image.encode_jpeg(image)
+      # Encoded off the graph by a FrameWriter, overlapping the next frame
+      render = tf.transpose(image_data)
 
       # debug_quantity = tf.pack((tf.to_int32(converged)*255,)*3)
       # debug_quantity = gradient
@@ -151,38 +168,84 @@ class Raytracer:
     summaries = tf.merge_all_summaries()
 
     self.graph = Graph(geometry, debug=debug)
+    self.geometry = geometry
+    self.lipschitz = lipschitz
+    self.bounds = bounds
+    self.strict = strict
+    self.numeric_functional = numeric_functional
     self.placeholders = placeholders
     self.resolution = resolution
+    self.tile_shape = tile_shape
     self.ops = {
       "cast": cast_op,
       "render": render,
       "reset": reset,
       "debug_render": debug_render,
       "summaries": summaries,
-      "converged_mask": converged
+      "converged_mask": converged,
+      "depth": t,
+      "hit": bitmask
     }
 
-  def run(self, frames=1, folder="output"):
+  def set_parameters(self, **parameters):
+    """Changes parameters of the geometry for following frames, without rebuilding the graph."""
+    self.graph.set_parameters(**parameters)
+    self.numeric_functional = self.geometry.numeric_functional
+    self.lipschitz = step_bound(self.numeric_functional, self.bounds, self.strict)
+
+  def run(self, frames=1, folder="output", cameras=None, warm_start=False, back_off=0.1):
+    import tensorflow as tf
+
     print("Running: Raytracer")
     self.graph.run(tf.initialize_all_variables())
     self.graph.session.graph.finalize()
 
-    for frame in range(frames):
-      print("Frame: " + str(frame))
-      with self.graph.tensorboard_logging("frame: "+str(frame)+", rayupdate: "):
-        image = self.render_frame(frame, frames)
-
-      with open(folder+"/Raytraced"+str(frame)+".jpg", "wb") as f:
-        f.write(image)
-
-  def render_frame(self, frame, frames, max_steps=50):
-    feed_dict = {}
-    camera = [-0.9,-0.1,-0.1]
-    feed_dict[self.placeholders["camera_position"]] = camera
+    # cameras may be a generator such as turntable(n)
+    cameras = list(cameras) if cameras is not None else [Camera()] * frames
+    previous = None
+    with FrameWriter() as writer:
+      for frame, camera in enumerate(cameras):
+        print("Frame: " + str(frame))
+        initial = None
+        if warm_start and previous is not None:
+          # Start from the previous frame's surface reprojected into this frame
+          initial = warm_start_depth(previous, self.depth, self.hit, camera, self.resolution, back_off)
+        with self.graph.tensorboard_logging("frame: "+str(frame)+", rayupdate: "):
+          image = self.render_frame(frame, len(cameras), camera=camera, initial=initial)
+        writer.write(folder+"/Raytraced"+str(frame)+".jpg", image)
+        previous = camera
+
+  def render_frame(self, frame, frames, max_steps=256, camera=None, initial=None):
+    """Renders an image of shape (h, w, 3) as uint8 seen from camera, tracing one tile at a time. Rays start at the
+    initial distances, of shape (w, h), if given. The distances and hits of the frame are kept as self.depth and
+    self.hit."""
+    camera = camera or Camera()
+    image = np.empty(tuple(self.resolution)[::-1] + (3,), dtype=np.uint8)
+    self.depth = np.empty(tuple(self.resolution))
+    self.hit = np.empty(tuple(self.resolution), dtype=bool)
+    initial = np.zeros(self.resolution) if initial is None else initial
+    for index, tile in enumerate(chunk_slices(self.resolution, self.tile_shape)):
+      pixels, self.depth[tile], self.hit[tile] = self.render_tile(frame, index, camera, tile, initial[tile], max_steps)
+      image[tile[::-1]] = pixels
+    return image
+
+  def render_tile(self, frame, index, camera, tile, initial, max_steps=256):
+    # Tiles along the far edges are padded out to tile_shape by repeating their last rays, then cropped
+    padding = [(0, n - (s.stop - s.start)) for s, n in zip(tile, self.tile_shape)]
+    origins, directions = camera.rays(self.resolution, tile)
+    origins = np.pad(origins, [(0, 0)] + padding, mode="edge")
+    directions = np.pad(directions, [(0, 0)] + padding, mode="edge")
+    feed_dict = {
+      self.placeholders["origins"]: origins,
+      self.placeholders["directions"]: directions,
+      self.placeholders["light_position"]: camera.light["position"],
+      self.placeholders["light_color"]: camera.light["color"],
+      self.placeholders["lipschitz"]: self.lipschitz
+    }
 
-    self.graph.run(self.ops['reset'])
+    self.graph.run(self.ops['reset'], {self.placeholders["initial_distances"]: np.pad(initial, padding, mode="edge")})
     step = 0
-    while step < max_steps:
+    while max_steps is None or step < max_steps:
       print("Render Step: " + str(step))
       _, debug, converged = self.graph.run(
         [self.ops['cast'], self.ops["debug_render"], self.ops['converged_mask']],
@@ -192,10 +255,16 @@ class Raytracer:
         break
 
       if self.graph.debug:
-        with open("output/debug"+str(step)+"frame"+str(frame)+".jpg", "wb") as f:
+        with open("output/debug"+str(step)+"frame"+str(frame)+"tile"+str(index)+".jpg", "wb") as f:
           f.write(debug)
 
       self.graph.run_summary(self.ops["summaries"], feed_dict)
       step += 1
 
-    return self.graph.run(self.ops['render'], feed_dict)
+    # Surface normals are shaded from the gradient at the points the rays reached
+    depth = self.graph.run(self.ops['depth'])
+    if "gradient" in self.placeholders:
+      feed_dict[self.placeholders["gradient"]] = self.numeric_functional.gradient(*(origins + directions * depth))
+    image, hit = self.graph.run([self.ops['render'], self.ops['hit']], feed_dict)
+    crop = tuple([slice(0, s.stop - s.start) for s in tile])
+    return image[crop[::-1]], depth[crop], hit[crop]
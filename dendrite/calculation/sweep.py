@@ -0,0 +1,77 @@
+import numpy as np
+from dendrite.calculation.grid import grid_coordinates, chunk_indices
+
+# Parameter sweeps evaluate many configurations of a Geometry on the same grid. The functional is built and
+# compiled once with its parameters as arguments, then configurations are stacked along a leading axis and
+# evaluated as a batch by a single broadcast call, so construction and compilation are amortized over the sweep.
+
+def volume(grids, bounds):
+  # Solid is where functionals are positive, every sample stands for a cell of the grid
+  shape = np.array(grids.shape[1:])
+  cell = np.prod((np.array(bounds[1], dtype=np.float64) - bounds[0]) / np.maximum(shape - 1, 1))
+  return np.sum(grids > 0, axis=(1, 2, 3)) * cell
+
+def solid_fraction(grids, bounds):
+  return np.mean(grids > 0, axis=(1, 2, 3))
+
+metrics = {
+  "volume": volume,
+  "solid_fraction": solid_fraction
+}
+
+def parameter_table(geometry, configurations):
+  """Arrays of the values of every swept parameter, one per configuration. Configurations are dicts of parameter
+  values, parameters they leave out keep their current values."""
+  names = sorted(set().union(*[c.keys() for c in configurations]))
+  for name in names:
+    if name not in geometry.parameters or not geometry.exposed(name):
+      raise ValueError("Only exposed numeric parameters of %s can be swept, not: %s" % (geometry.name, name))
+  return dict([
+    (name, np.array([c.get(name, geometry.parameters[name]) for c in configurations], dtype=np.float64))
+    for name in geometry.parameters if geometry.exposed(name)
+  ])
+
+def evaluate_batch(geometry, table, count, X, Y, Z):
+  # count configurations, which are only distinguished by table when the geometry exposes parameters
+  shape = (count,) + X.shape
+  functional = geometry.parametric_functional
+  if functional is None:
+    # Parameters the function needs the values of, every configuration is built separately
+    return np.array([
+      geometry.function(**{**geometry.parameters, **dict([(n, v[i]) for n, v in table.items()])})(X, Y, Z)
+      for i in range(count)
+    ])
+
+  bound = functional.bind(**geometry.parameters)
+  expand = (slice(None),) + (None,) * X.ndim
+  arguments = dict([(p.name, table[p.name][expand]) for p in bound.parameters])
+  return np.broadcast_to(functional.parametric_lambda(bound.parameters)(X[None], Y[None], Z[None], **arguments), shape)
+
+def sweep(geometry, configurations, coordinate_shape, bounds, metrics=None, batch_size=8, out=None):
+  """Evaluates geometry on the grid of coordinate_shape spanning bounds for every configuration, batch_size
+  configurations at a time.
+
+  Returns the grids stacked along a leading axis, assembled in out if given, or with metrics, a dict mapping
+  metric names to arrays of one value per configuration, where metrics maps names to functions of a batch of grids
+  and the bounds. Only a batch of grids is held in memory then.
+  """
+  table = parameter_table(geometry, configurations)
+  coordinate_shape = tuple(coordinate_shape)
+  X, Y, Z = grid_coordinates(chunk_indices(tuple([slice(0, n) for n in coordinate_shape])), coordinate_shape, bounds)
+
+  if metrics is None and out is None:
+    out = np.empty((len(configurations),) + coordinate_shape, dtype=np.float32)
+  results = dict([(name, []) for name in metrics or {}])
+  for start in range(0, len(configurations), batch_size):
+    batch = dict([(name, values[start:start + batch_size]) for name, values in table.items()])
+    count = min(batch_size, len(configurations) - start)
+    grids = evaluate_batch(geometry, batch, count, X, Y, Z)
+    if metrics is None:
+      out[start:start + len(grids)] = grids
+    else:
+      for name, metric in metrics.items():
+        results[name].append(metric(grids, bounds))
+
+  if metrics is None:
+    return out
+  return dict([(name, np.concatenate(values)) for name, values in results.items()])
@@ -1,22 +1,52 @@
 import numpy as np
-import tensorflow as tf
 from dendrite.calculation.graph import Graph
 from dendrite.core.functional import Functional
 from dendrite.core.geometry import Geometry
+from dendrite.calculation.octree import Octree
+from dendrite.calculation.grid import grid_coordinates, chunk_slices, chunk_indices
+from dendrite.calculation.parallel import evaluate_parallel
 
 class Volumetric:
-  def __init__(self, geometry, coordinate_shape, bounds, debug=False):
+  def __init__(self, geometry, coordinate_shape, bounds, debug=False, adaptive=False, leaf_size=4, chunk_shape=None, numeric=False, workers=None, native=False):
+    self.geometry = geometry
+    self.coordinate_shape = tuple(coordinate_shape)
+    self.bounds = bounds
+    self.chunk_shape = tuple(chunk_shape) if chunk_shape is not None else None
+    self.adaptive = adaptive
+    self.workers = workers
+    self.native = native
+    if native and (adaptive or workers is not None or self.chunk_shape is not None):
+      # The kernel fills the whole grid in parallel itself
+      raise ValueError("Native evaluation can not be combined with adaptive, workers or chunk_shape")
+    self.numeric = numeric or adaptive or workers is not None or native
+    if self.numeric:
+      # Evaluated with NumPy, adaptively only sampling cells which can contain the surface, or in parallel tiles,
+      # or natively by a compiled C kernel
+      self.functional = geometry.numeric_functional if isinstance(geometry, Geometry) else geometry
+      if adaptive:
+        self.octree = Octree(self.functional, coordinate_shape, bounds, leaf_size)
+      return
+
+    import tensorflow as tf
+
     functional = geometry.functional
 
     placeholders = {}
 
-    min_bounds, max_bounds = bounds
-    resolutions = list(map(lambda x: x*1j, coordinate_shape))
-    space_grid = np.mgrid[min_bounds[0]:max_bounds[0]:resolutions[0],min_bounds[1]:max_bounds[1]:resolutions[1],min_bounds[2]:max_bounds[2]:resolutions[2]]
-    space_grid = space_grid.astype(np.float32)
-    x = tf.Variable(space_grid[0,:,:,:], trainable=False, name="X-Coordinates")
-    y = tf.Variable(space_grid[1,:,:,:], trainable=False, name="Y-Coordinates")
-    z = tf.Variable(space_grid[2,:,:,:], trainable=False, name="Z-Coordinates")
+    if self.chunk_shape is None:
+      min_bounds, max_bounds = bounds
+      resolutions = list(map(lambda x: x*1j, coordinate_shape))
+      space_grid = np.mgrid[min_bounds[0]:max_bounds[0]:resolutions[0],min_bounds[1]:max_bounds[1]:resolutions[1],min_bounds[2]:max_bounds[2]:resolutions[2]]
+      space_grid = space_grid.astype(np.float32)
+      x = tf.Variable(space_grid[0,:,:,:], trainable=False, name="X-Coordinates")
+      y = tf.Variable(space_grid[1,:,:,:], trainable=False, name="Y-Coordinates")
+      z = tf.Variable(space_grid[2,:,:,:], trainable=False, name="Z-Coordinates")
+    else:
+      # Coordinates are fed one chunk at a time, so the full grid is never allocated
+      x = tf.placeholder(tf.float32, shape=self.chunk_shape, name="X-Coordinates")
+      y = tf.placeholder(tf.float32, shape=self.chunk_shape, name="Y-Coordinates")
+      z = tf.placeholder(tf.float32, shape=self.chunk_shape, name="Z-Coordinates")
+      placeholders = {"x": x, "y": y, "z": z}
 
     draw_op = functional(x,y,z)
     sanity_checked = tf.verify_tensor_all_finite(draw_op, "Sanity Check Failed", name="SanityCheck")
@@ -27,10 +57,60 @@ class Volumetric:
 
     self.graph = graph
     self.placeholders = placeholders
-    self.coordinate_shape = coordinate_shape
     self.ops = {"draw": sanity_checked}
 
-  def run(self, bounds=[[-1,-1,-1],[1,1,1]]):
+  def set_parameters(self, **parameters):
+    """Changes parameters of the geometry for following runs, reusing the compiled functional or graph."""
+    if not isinstance(self.geometry, Geometry):
+      raise ValueError("Only Geometry parameters can be set, not those of %s" % type(self.geometry))
+    if not self.numeric:
+      return self.graph.set_parameters(**parameters)
+
+    self.geometry.set_parameters(**parameters)
+    self.functional = self.geometry.numeric_functional
+    if self.adaptive:
+      self.octree.functional = self.functional
+
+  def evaluate_chunk(self, chunk):
+    if self.numeric:
+      X, Y, Z = grid_coordinates(chunk_indices(chunk), self.coordinate_shape, self.bounds)
+      return np.asarray(self.functional(X, Y, Z), dtype=np.float32)
+
+    X, Y, Z = grid_coordinates(chunk_indices(chunk, self.chunk_shape), self.coordinate_shape, self.bounds).astype(np.float32)
+    feed = {self.placeholders["x"]: X, self.placeholders["y"]: Y, self.placeholders["z"]: Z}
+    values = self.graph.run(self.ops["draw"], feed)
+    return values[tuple([slice(0, s.stop - s.start) for s in chunk])]
+
+  def stream(self):
+    """Yields (chunk, values) for every chunk of the grid as it is evaluated, where chunk is a tuple of slices into
+    the full grid. Peak memory is proportional to chunk_shape rather than coordinate_shape."""
+    for chunk in chunk_slices(self.coordinate_shape, self.chunk_shape or self.coordinate_shape):
+      yield chunk, self.evaluate_chunk(chunk)
+
+  def run(self, bounds=[[-1,-1,-1],[1,1,1]], out=None):
     print("Running: Volumetric")
+    if self.adaptive:
+      return self.octree.run()
+
+    if self.native:
+      # out may be the path of a .npy file, which the kernel fills memory mapped
+      if isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=self.coordinate_shape)
+      return self.functional.compiled_c.grid(self.coordinate_shape, self.bounds, out)
+
+    if self.workers is not None:
+      # out may be the path of a .npy file, which the tiles are assembled into
+      path = out if isinstance(out, str) else None
+      tile_shape = self.chunk_shape or (64, 64, 64)
+      return evaluate_parallel(self.functional, self.coordinate_shape, self.bounds, tile_shape, self.workers, path)
+
+    if self.numeric or self.chunk_shape is not None:
+      # out may be a memory mapped array, so the assembled grid need not fit in memory either
+      if out is None:
+        out = np.empty(self.coordinate_shape, dtype=np.float32)
+      for chunk, values in self.stream():
+        out[chunk] = values
+      return out
+
     with self.graph.tensorboard_logging("Volumetric"):
       return self.graph.run(self.ops["draw"], {})
@@ -0,0 +1,168 @@
+import os
+import atexit
+import shutil
+import ctypes
+import tempfile
+import subprocess
+import numpy
+import sympy
+from sympy.abc import x, y, z
+from sympy.core.compatibility import is_sequence
+from sympy.printing.ccode import C99CodePrinter
+from dendrite.codegen.glsl_codegen import CodeGenError, CodeGenArgumentListError
+from dendrite.utils.compilation_cache import compilation_cache
+
+# Functionals are lowered to C99 and compiled ahead of time into shared libraries, which evaluate the whole
+# expression per point without NumPy's temporaries. Kernels loop over arrays of points or grids in parallel with
+# OpenMP, and libraries are cached on disk by the hash of their source next to the other compiled artifacts.
+
+openmp_flags = ["-fopenmp"]
+compile_flags = ["-O3", "-shared", "-fPIC", "-std=c99"]
+
+class CCodePrinter(C99CodePrinter):
+  def _print_Heaviside(self, expr):
+    # Half at zero, as numpy.heaviside(x, 0.5) in generated NumPy code
+    arg = self._print(expr.args[0])
+    return "((%s) > 0 ? 1.0 : ((%s) < 0 ? 0.0 : 0.5))" % (arg, arg)
+
+def print_c(expr):
+  printer = CCodePrinter({"human": False})
+  _, not_supported, code = printer.doprint(expr)
+  if not_supported:
+    raise CodeGenError("Not supported in C: %s" % ", ".join(sorted(map(str, not_supported))))
+  return code
+
+kernels = """
+void %(name)s_points(const double *x, const double *y, const double *z, double *out, long n) {
+  long i;
+  #pragma omp parallel for schedule(static)
+  for (i = 0; i < n; i++) {
+    out[i] = %(name)s(x[i], y[i], z[i]);
+  }
+}
+
+void %(name)s_grid(const double *lower, const double *step, const long *shape, float *out) {
+  long i, j, k;
+  #pragma omp parallel for private(j, k) schedule(static)
+  for (i = 0; i < shape[0]; i++) {
+    for (j = 0; j < shape[1]; j++) {
+      for (k = 0; k < shape[2]; k++) {
+        out[(i * shape[1] + j) * shape[2] + k] = (float) %(name)s(lower[0] + i * step[0], lower[1] + j * step[1], lower[2] + k * step[2]);
+      }
+    }
+  }
+}
+"""
+
+def ccodegen(expr, name="field"):
+  """Generates C99 source defining name(x, y, z) evaluating expr, with common subexpressions in temporaries, and
+  kernels evaluating it over arrays of points (name_points) and over grids (name_grid)."""
+  if is_sequence(expr):
+    raise CodeGenError("Only functionals can be generated as C, not transformations")
+  expr = sympy.sympify(expr)
+  missing = expr.free_symbols - set([x, y, z])
+  if missing:
+    msg = "Argument list didn't specify: {0} ".format(", ".join(sorted([str(m) for m in missing])))
+    raise CodeGenArgumentListError(msg, missing)
+
+  temporaries, reduced = sympy.cse(expr, symbols=sympy.numbered_symbols("cse"), optimizations="basic")
+  lines = ["#include <math.h>", "", "static double %s(double x, double y, double z) {" % name]
+  lines += ["  const double %s = %s;" % (symbol, print_c(value)) for symbol, value in temporaries]
+  lines += ["  return %s;" % print_c(reduced[0]), "}"]
+  return "\n".join(lines) + "\n" + kernels % {"name": name}
+
+private_directory = None
+
+def library_path(key):
+  # Libraries live in the compilation cache, where they are evicted with the other artifacts
+  if compilation_cache.directory is not None:
+    path = compilation_cache.path(key) + ".so"
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      return path
+    except OSError:
+      pass
+
+  # Otherwise in a directory only this process can write to, as existing libraries are loaded without checks
+  global private_directory
+  if private_directory is None:
+    private_directory = tempfile.mkdtemp(prefix="dendrite-")
+    atexit.register(shutil.rmtree, private_directory, True)
+  return os.path.join(private_directory, key + ".so")
+
+def compile_c(source):
+  """Compiles source to a shared library with the C compiler in $CC, cc by default, returning its path.
+  Libraries are reused while their source and compiler are unchanged. Without OpenMP kernels run serially."""
+  compiler = os.environ.get("CC", "cc")
+  path = library_path(compilation_cache.key(source, compiler, " ".join(compile_flags), "c"))
+  if os.path.exists(path):
+    os.utime(path)
+    return path
+
+  directory = os.path.dirname(path)
+  descriptor, source_path = tempfile.mkstemp(suffix=".c", dir=directory)
+  with os.fdopen(descriptor, "w") as f:
+    f.write(source)
+  descriptor, temporary_path = tempfile.mkstemp(suffix=".so", dir=directory)
+  os.close(descriptor)
+
+  try:
+    for flags in [openmp_flags, []]:
+      command = [compiler] + compile_flags + flags + ["-o", temporary_path, source_path, "-lm"]
+      result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+      if result.returncode == 0:
+        # Rename into place, so concurrent processes never load a partial library
+        os.replace(temporary_path, path)
+        if compilation_cache.directory is not None:
+          compilation_cache.track(path)
+        return path
+    raise CodeGenError("Compiling generated C failed:\n" + result.stdout.decode(errors="replace"))
+  finally:
+    for leftover in [source_path, temporary_path]:
+      if os.path.exists(leftover):
+        os.remove(leftover)
+
+double_array = numpy.ctypeslib.ndpointer(numpy.float64, flags="C_CONTIGUOUS")
+float_array = numpy.ctypeslib.ndpointer(numpy.float32, flags="C_CONTIGUOUS")
+long_array = numpy.ctypeslib.ndpointer(numpy.int64, flags="C_CONTIGUOUS")
+
+class CompiledC:
+  """Evaluates a functional with the kernels of a compiled library. Only the source is pickled, unpickling loads
+  the cached library."""
+  def __init__(self, source, name="field"):
+    self.source = source
+    self.name = name
+    self.load()
+
+  def load(self):
+    self.path = compile_c(self.source)
+    library = ctypes.CDLL(self.path)
+    self.points_kernel = getattr(library, self.name + "_points")
+    self.points_kernel.argtypes = [double_array] * 4 + [ctypes.c_long]
+    self.points_kernel.restype = None
+    self.grid_kernel = getattr(library, self.name + "_grid")
+    self.grid_kernel.argtypes = [double_array, double_array, long_array, float_array]
+    self.grid_kernel.restype = None
+
+  def __getstate__(self):
+    return {"source": self.source, "name": self.name}
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.load()
+
+  def __call__(self, X, Y, Z):
+    X, Y, Z = [numpy.ascontiguousarray(c, dtype=numpy.float64) for c in numpy.broadcast_arrays(X, Y, Z)]
+    out = numpy.empty(X.shape)
+    self.points_kernel(X, Y, Z, out, X.size)
+    return out
+
+  def grid(self, coordinate_shape, bounds, out=None):
+    """Values on the same grid as Volumetric, of coordinate_shape spanning bounds, as float32."""
+    shape = numpy.array(coordinate_shape, dtype=numpy.int64)
+    lower = numpy.array(bounds[0], dtype=numpy.float64)
+    step = (numpy.array(bounds[1], dtype=numpy.float64) - lower) / numpy.maximum(shape - 1, 1)
+    if out is None:
+      out = numpy.empty(tuple(coordinate_shape), dtype=numpy.float32)
+    self.grid_kernel(lower, step, shape, out)
+    return out
@@ -1,3 +1,4 @@
+import sympy
 from sympy.core import Symbol, S, Expr, Tuple, Equality, Function
 from sympy.core.compatibility import StringIO, is_sequence
 from sympy.abc import x, y, z
@@ -368,6 +369,44 @@ def glslcodegen(name_expr, empty=True, argument_sequence=None, global_vars=None)
 
   return code_gen.write(routines, empty)
 
+def glsl_function(name, expr, local_vars=()):
+  """Source of a GLSL function of the point p returning expr, a float or a tuple of three components for a vec3,
+  after declaring local_vars, as (datatype, name, value) triples. Returns the source and the constants it uses."""
+  datatype = "vec3" if is_sequence(expr) else "float"
+  if is_sequence(expr):
+    expr = Tuple(*expr)
+
+  temporaries, expr = common_subexpressions(expr)
+  if datatype == "float" and expr.is_Integer:
+    # Integer literals are not returned as floats
+    expr = sympy.Float(expr)
+  constants, code = print_glsl(expr)
+  lines = ["%s %s(vec3 p) {" % (datatype, name)]
+  lines += ["  %s %s = %s;" % local for local in local_vars]
+  for symbol, value in temporaries:
+    used, value_code = print_glsl(value)
+    constants |= used
+    lines.append("  float %s = %s;" % (symbol, value_code))
+  lines += ["  return %s;" % code, "}"]
+  return "\n".join(lines) + "\n", constants
+
+def common_subexpressions(expr):
+  # Subexpressions occurring more than once are evaluated once into float temporaries, in order of dependence
+  temporaries, reduced = sympy.cse(expr, symbols=sympy.numbered_symbols("cse"), optimizations="basic")
+  return temporaries, reduced[0]
+
+def print_glsl(expr, assign_to=None):
+  constants, not_supported, code = glslcode(expr, human=False, assign_to=assign_to)
+  if not_supported:
+    raise CodeGenError("Not supported in GLSL: %s" % ", ".join(sorted(map(str, not_supported))))
+  return set(constants), code
+
+def glsl_module(functions, constants, uniforms=()):
+  """A GLSL module defining constants and declaring float uniforms once, followed by functions in order."""
+  declarations = ["#define %s %s\n" % (name, value) for name, value in sorted(constants, key=str)]
+  declarations += ["uniform float %s;\n" % uniform for uniform in uniforms]
+  return "\n".join(["".join(declarations)] + list(functions) if declarations else list(functions))
+
 class GLSLCodeGen(CodeGen):
   def get_prototype(self, routine):
     if isinstance(routine.result, Tuple):
@@ -393,16 +432,26 @@ class GLSLCodeGen(CodeGen):
     assign_to = routine.name + "_result"
     code_lines.append("{0} {1};\n".format(result.datatype, str(assign_to)))
 
+    temporaries, expr = common_subexpressions(result.expr)
+    constants = set()
+    temporary_lines = []
+    for symbol, value in temporaries:
+      used, value_code = print_glsl(value)
+      constants |= used
+      temporary_lines.append("float %s = %s;\n" % (symbol, value_code))
+
     try:
-      constants, not_supported, glsl_expr = glslcode(result.expr, human=False, assign_to=assign_to)
+      used, glsl_expr = print_glsl(expr, assign_to=assign_to)
     except AssignmentError:
       assign_to = result.result_var
       code_lines.append("%s %s;\n" % (result, str(assign_to)))
-      constants, not_supported, glsl_expr = glslcode(result.expr, human=False, assign_to=assign_to)
+      used, glsl_expr = print_glsl(expr, assign_to=assign_to)
+    constants |= used
 
     for name, value in sorted(constants, key=str):
-      code_lines.append("#define %s = %s;\n" % (name, value))
+      code_lines.append("#define %s %s\n" % (name, value))
 
+    code_lines.extend(temporary_lines)
     code_lines.append("%s\n" % glsl_expr)
     code_lines.append("   return %s;\n" % assign_to)
     return code_lines
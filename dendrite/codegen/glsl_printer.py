@@ -57,7 +57,7 @@ class GLSLCodePrinter(CodePrinter):
     return "// {0}".format(text)
 
   def _declare_number_const(self, name, value):
-    return "#define {0} = {1};".format(name, value)
+    return "#define {0} {1}".format(name, value)
 
   def _format_code(self, lines):
     return self.indent_code(lines)
@@ -91,6 +91,9 @@ class GLSLCodePrinter(CodePrinter):
       return '1/%s' % (self.parenthesize(expr.base, PREC))
     elif expr.exp == 0.5:
       return 'sqrt(%s)' % self._print(expr.base)
+    elif expr.exp.is_Integer and 1 < expr.exp <= 4:
+      # pow is undefined for negative bases, small integer powers are products instead
+      return '(%s)' % '*'.join([self.parenthesize(expr.base, PREC)] * int(expr.exp))
     else:
       # Convert to float, otherwise type error
       return 'pow(%s, float(%s))' % (self._print(expr.base),
@@ -115,8 +118,9 @@ class GLSLCodePrinter(CodePrinter):
       self._print(Max(*expr.args[1:]), **kwargs))
 
   def _print_Rational(self, expr):
+    # Float literals, as integer division truncates
     p, q = int(expr.p), int(expr.q)
-    return '%d/%d' % (p, q)
+    return '%d.0/%d.0' % (p, q)
 
   def _print_Tuple(self, expr):
     return 'vec'+str(len(expr)) + "(" + ", ".join([self._print(sub) for sub in expr]) + ")"
@@ -0,0 +1,127 @@
+import numpy as np
+from collections import OrderedDict
+from dendrite.core.geometry import Geometry
+from dendrite.core.functional import Functional
+from dendrite.core.lipschitz import step_bound, default_bounds
+
+# Fragment shaders sphere tracing a Functional or Geometry on the GPU, mirroring Raytracer: rays leave an image plane
+# centered on the camera position, step by |F| / lipschitz until they reach the surface or the clip length, and are
+# shaded by the light and ambient color. Camera, light, the Lipschitz bound and Geometry parameters are uniforms,
+# so a shader is generated and compiled once for every view and parameter value.
+
+version = "#version 330 core"
+
+ambient_color = (119, 139, 165)
+sky_color = (70, 130, 180)
+
+camera_uniforms = OrderedDict([
+  ("u_resolution", "vec2"),
+  ("u_camera_position", "vec3"),
+  ("u_camera_forward", "vec3"),
+  ("u_camera_right", "vec3"),
+  ("u_camera_up", "vec3"),
+  ("u_focal_length", "float"),
+  ("u_light_position", "vec3"),
+  ("u_light_color", "vec3"),
+  ("u_lipschitz", "float")
+])
+
+def glsl_vector(vector):
+  return "vec3(%s)" % ", ".join(["%r" % float(v) for v in vector])
+
+tracer = """
+float march(vec3 origin, vec3 direction, out bool hit) {
+  float t = 0.0;
+  hit = false;
+  for (int i = 0; i < MAX_STEPS; i++) {
+    float value = field(origin + direction * t);
+    float magnitude = abs(value);
+    if (magnitude < EPSILON) {
+      hit = true;
+      return t;
+    }
+    // No step of |F| / L crosses the surface when L bounds the gradient norm of F
+    t -= sign(value) * max(magnitude, EPSILON) / u_lipschitz;
+    if (t > CLIP_LENGTH) {
+      return t;
+    }
+  }
+  return t;
+}
+
+vec3 gradient(vec3 p) {
+  vec2 h = vec2(GRADIENT_STEP, 0.0);
+  return vec3(
+    field(p + h.xyy) - field(p - h.xyy),
+    field(p + h.yxy) - field(p - h.yxy),
+    field(p + h.yyx) - field(p - h.yyx)
+  ) / (2.0 * GRADIENT_STEP);
+}
+
+vec3 shade(vec3 p) {
+  // Note this is strictly the negative normal vector, as grad(F) points inward
+  vec3 normal = normalize(gradient(p));
+  vec3 incidence = normalize(normal - u_light_position);
+  float incidence_angle = max(dot(incidence, normal), 0.0);
+  return mix(u_light_color * incidence_angle, AMBIENT_COLOR, 0.5);
+}
+
+void main() {
+  // The image plane spans [-1, 1] vertically and is centered on the camera position
+  float aspect_ratio = u_resolution.x / u_resolution.y;
+  vec2 uv = 2.0 * gl_FragCoord.xy / u_resolution - 1.0;
+  vec3 origin = u_camera_position + uv.x * aspect_ratio * u_camera_right + uv.y * u_camera_up;
+  vec3 eye = u_camera_position - u_focal_length * u_camera_forward;
+  vec3 direction = normalize(origin - eye);
+
+  bool hit;
+  float t = march(origin, direction, hit);
+  vec3 color = hit ? shade(origin + direction * t) : SKY_COLOR;
+  fragColor = vec4(clamp(color, 0.0, 255.0) / 255.0, 1.0);
+}
+"""
+
+def fragment_shader(geometry, epsilon=1e-4, clip_length=100, max_steps=256, gradient_step=1e-4):
+  """Source of a fragment shader sphere tracing geometry, a Functional or Geometry, whose uniforms are set from
+  shader_uniforms."""
+  if not isinstance(geometry, (Geometry, Functional)):
+    raise ValueError("Can't emit a shader for instance of %s" % type(geometry))
+  field = geometry.as_glsl("field")
+
+  header = [
+    version,
+    "",
+    "#define MAX_STEPS %d" % max_steps,
+    "#define EPSILON %r" % float(epsilon),
+    "#define CLIP_LENGTH %r" % float(clip_length),
+    "#define GRADIENT_STEP %r" % float(gradient_step),
+    "#define AMBIENT_COLOR %s" % glsl_vector(ambient_color),
+    "#define SKY_COLOR %s" % glsl_vector(sky_color),
+    "",
+    "out vec4 fragColor;",
+    ""
+  ] + ["uniform %s %s;" % (datatype, name) for name, datatype in camera_uniforms.items()]
+  return "\n".join(header) + "\n\n" + field + tracer
+
+def shader_uniforms(geometry, camera, resolution=(1920, 1080), bounds=default_bounds, strict=False):
+  """Values of the uniforms of fragment_shader(geometry) rendering the view of camera at resolution, including the
+  current parameters of a Geometry. Without a known Lipschitz bound one is estimated within bounds, unless strict."""
+  forward, right, up = camera.basis()
+  uniforms = OrderedDict([
+    ("u_resolution", np.array(resolution, dtype=np.float64)),
+    ("u_camera_position", camera.position),
+    ("u_camera_forward", forward),
+    ("u_camera_right", right),
+    ("u_camera_up", up),
+    ("u_focal_length", camera.focal_length),
+    ("u_light_position", camera.light["position"]),
+    ("u_light_color", camera.light["color"])
+  ])
+
+  if isinstance(geometry, Geometry):
+    uniforms["u_lipschitz"] = step_bound(geometry.numeric_functional, bounds, strict)
+    for parameter in geometry.glsl_manifest()["uniforms"].values():
+      uniforms[parameter["uniform"]] = parameter["value"]
+  else:
+    uniforms["u_lipschitz"] = step_bound(geometry, bounds, strict)
+  return uniforms
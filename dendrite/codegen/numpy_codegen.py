@@ -0,0 +1,114 @@
+import numpy
+import sympy
+from sympy.core import Tuple
+from sympy.core.compatibility import is_sequence
+from sympy.abc import x, y, z
+from dendrite.codegen.numpy_printer import NumPyCodePrinter
+from dendrite.codegen.glsl_codegen import CodeGenError, CodeGenArgumentListError
+
+# Vectorized NumPy functions are generated as plain python source, so that the source itself can be
+# inspected, cached or shipped elsewhere and compiled with compile_numpy.
+
+def numpycodegen(name_expr, argument_sequence=(x, y, z), cse=False):
+  """Generates python source defining a vectorized NumPy function for every (name, expr) pair.
+
+  Tuples of expressions (transformations) become functions returning tuples of arrays.
+  With cse, common subexpressions are assigned to temporaries and evaluated once.
+  """
+  if isinstance(name_expr[0], str):
+    # single tuple is given, turn it into a singleton list with a tuple.
+    name_expr = [name_expr]
+
+  routines = []
+  for name, expr in name_expr:
+    if is_sequence(expr):
+      expr = Tuple(*expr)
+
+    missing = expr.free_symbols - set(argument_sequence)
+    if missing:
+      msg = "Argument list didn't specify: {0} "
+      msg = msg.format(", ".join(sorted([str(m) for m in missing])))
+      raise CodeGenArgumentListError(msg, missing)
+
+    assignments = []
+    if cse:
+      temporaries, reduced = sympy.cse(expr, symbols=sympy.numbered_symbols("cse"), optimizations="basic")
+      assignments, expr = temporaries, reduced[0]
+
+    printer = NumPyCodePrinter()
+    lines = ["  %s = %s\n" % (printer.doprint(symbol), printer.doprint(value)) for symbol, value in assignments]
+    code = printer.doprint(expr)
+    if printer._not_supported:
+      raise CodeGenError("Not supported in NumPy: %s" % ", ".join(sorted(map(str, printer._not_supported))))
+
+    arguments = [printer.doprint(arg) for arg in argument_sequence]
+    routines.append("%s\n%s  return %s\n" % (numpy_signature(name, arguments), "".join(lines), code))
+
+  return "\n".join(routines)
+
+def numpy_signature(name, arguments, defaults=None):
+  # Arguments found in defaults become keyword arguments, so parameters can be bound in the source itself
+  defaults = defaults or {}
+  printed = [a if a not in defaults else "%s=%r" % (a, float(defaults[a])) for a in arguments]
+  return "def %s(%s):" % (name, ", ".join(printed))
+
+def bind_numpy(source, name, arguments, defaults):
+  """Binds arguments of the function called name in source generated by numpycodegen to the values in defaults,
+  without generating the source again."""
+  return source.replace(numpy_signature(name, arguments) + "\n", numpy_signature(name, arguments, defaults) + "\n", 1)
+
+module_header = """# Generated by dendrite, evaluating %s with NumPy alone.
+import numpy
+
+# Defaults of the keyword parameters of every function
+parameters = %r
+
+"""
+
+def numpy_module(name_expr, parameters=None, description="a functional"):
+  """Generates the source of a standalone python module defining a vectorized function for every (name, expr) pair,
+  with common subexpressions evaluated once. Symbols named in parameters become keyword arguments defaulting to their
+  values, which the module also lists in a parameters dict. The module imports nothing but numpy."""
+  if isinstance(name_expr[0], str):
+    name_expr = [name_expr]
+  parameters = dict([(name, float(value)) for name, value in (parameters or {}).items()])
+
+  symbols = dict([(s.name, s) for _, expr in name_expr for s in sympy.sympify(expr).free_symbols])
+  arguments = (x, y, z) + tuple([symbols.get(name, sympy.Symbol(name)) for name in sorted(parameters)])
+  source = numpycodegen(name_expr, arguments, cse=True)
+  for name, _ in name_expr:
+    source = bind_numpy(source, name, [str(a) for a in arguments], parameters)
+  return module_header % (description, parameters) + source
+
+def compile_numpy(source, name):
+  """Compiles source generated by numpycodegen, returning the function called name."""
+  namespace = {"numpy": numpy}
+  exec(compile(source, "<numpycodegen: %s>" % name, "exec"), namespace)
+  return namespace[name]
+
+class CompiledFunctional:
+  """Evaluates a functional and its gradient from generated source, standing in for a Functional in worker
+  processes. Only the source is pickled."""
+  def __init__(self, numpy_source, gradient_source):
+    self.numpy_source = numpy_source
+    self.gradient_source = gradient_source
+    self.compile()
+
+  def compile(self):
+    self.function = compile_numpy(self.numpy_source, "operad")
+    self.gradient_function = compile_numpy(self.gradient_source, "gradient")
+
+  def __getstate__(self):
+    return {"numpy_source": self.numpy_source, "gradient_source": self.gradient_source}
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.compile()
+
+  def __call__(self, X, Y, Z):
+    X, Y, Z = numpy.broadcast_arrays(X, Y, Z)
+    return numpy.broadcast_to(self.function(X, Y, Z), X.shape)
+
+  def gradient(self, X, Y, Z):
+    X, Y, Z = numpy.broadcast_arrays(X, Y, Z)
+    return numpy.array([numpy.broadcast_to(g, X.shape) for g in self.gradient_function(X, Y, Z)])
@@ -0,0 +1,57 @@
+"""
+NumPy code printer
+
+The NumPyCodePrinter converts single sympy expressions into single
+vectorized NumPy expressions, which evaluate elementwise over arrays.
+
+"""
+
+from sympy.printing.pycode import NumPyPrinter
+
+class NumPyCodePrinter(NumPyPrinter):
+  """"A Printer to convert sympy expressions to strings of vectorized NumPy code
+  """
+  printmethod = '_numpycode'
+  language = 'Python with NumPy'
+
+  def _print_Min(self, expr, **kwargs):
+    # numpy.amin reduces over the whole array, numpy.minimum is elementwise
+    from sympy import Min
+    if len(expr.args) == 1:
+      return self._print(expr.args[0], **kwargs)
+
+    return '{0}({1}, {2})'.format(
+      self._module_format('numpy.minimum'),
+      self._print(expr.args[0], **kwargs),
+      self._print(Min(*expr.args[1:]), **kwargs))
+
+  def _print_Max(self, expr, **kwargs):
+    from sympy import Max
+    if len(expr.args) == 1:
+      return self._print(expr.args[0], **kwargs)
+
+    return '{0}({1}, {2})'.format(
+      self._module_format('numpy.maximum'),
+      self._print(expr.args[0], **kwargs),
+      self._print(Max(*expr.args[1:]), **kwargs))
+
+  def _print_Abs(self, expr):
+    return '{0}({1})'.format(self._module_format('numpy.abs'), self._print(expr.args[0]))
+
+  def _print_Heaviside(self, expr):
+    # Derivatives of Min, Max and Abs, half at the origin as sympy's default
+    return '{0}({1}, 0.5)'.format(self._module_format('numpy.heaviside'), self._print(expr.args[0]))
+
+  def _print_Tuple(self, expr):
+    return '(' + ', '.join([self._print(sub) for sub in expr]) + ',)'
+
+def numpycode(expr, **settings):
+  """Converts an expr to a string of vectorized NumPy code
+
+  Parameters
+  ==========
+
+  expr : Expr
+      A sympy expression to be converted.
+  """
+  return NumPyCodePrinter(settings).doprint(expr)
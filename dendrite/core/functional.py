@@ -1,13 +1,18 @@
 import sympy
-from sympy.abc import t
+import numpy as np
+from sympy.abc import t, x, y, z
 from functools import partial
 from numbers import Number
-from tensorflow import Tensor
 from dendrite.core.operad import Operad
 from dendrite.core.algebra import Algebra
 from dendrite.core.transformation import Transformation
 from dendrite.core.expression import Expression
 from dendrite.mathematics.elementary import Max, Min
+from dendrite.mathematics.calculus import gradient as symbolic_gradient
+from dendrite.codegen.numpy_codegen import numpycodegen, numpy_module, compile_numpy, bind_numpy
+from dendrite.codegen.c_codegen import ccodegen, CompiledC
+from dendrite.core.substitution import substitute
+from dendrite.mathematics.interval import evaluate_interval, coordinates
 from dendrite.decorators.type_coercion import convert_to_operad, functional_lambda, transformation_lambda
 
 class Functional(Operad, Algebra):
@@ -17,6 +22,64 @@ class Functional(Operad, Algebra):
     else:
       expression = expr
     super().__init__(expression, namespace)
+    self._gradient_lambda = None
+    self._parametric_lambdas = {}
+    self._compiled_c = None
+
+  @property
+  def gradient_source(self):
+    # Differentiated once and cached with the other compiled artifacts, temporaries are shared between components
+    return self.cached("numpy_gradient", lambda: numpycodegen(("gradient", symbolic_gradient(self.flattened)), cse=True))
+
+  @property
+  def gradient_lambda(self):
+    if self._gradient_lambda is None:
+      self._gradient_lambda = compile_numpy(self.gradient_source, "gradient")
+    return self._gradient_lambda
+
+  def gradient(self, X, Y, Z):
+    """Gradient at arrays of coordinates, of shape (3,) + the broadcast shape of X, Y and Z."""
+    X, Y, Z = np.broadcast_arrays(X, Y, Z)
+    return np.array([np.broadcast_to(g, X.shape) for g in self.gradient_lambda(X, Y, Z)])
+
+  @property
+  def c_source(self):
+    return self.cached("c", lambda: ccodegen(self.flattened))
+
+  @property
+  def compiled_c(self):
+    # Compiled ahead of time, the shared library is cached on disk by the hash of its source
+    if self._compiled_c is None:
+      self._compiled_c = CompiledC(self.c_source)
+    return self._compiled_c
+
+  def parametric_source(self, parameters, gradient=False):
+    # Source taking the parameter symbols as arguments after the coordinates, generated once for every binding
+    arguments = (x, y, z) + tuple(parameters)
+    names = ",".join([str(p) for p in parameters])
+    if gradient:
+      compute = lambda: numpycodegen(("gradient", symbolic_gradient(self.flattened)), arguments, cse=True)
+      return self.cached("numpy_gradient:" + names, compute)
+    return self.cached("numpy:" + names, lambda: numpycodegen(("operad", self.flattened), arguments, cse=True))
+
+  def parametric_lambda(self, parameters, gradient=False):
+    key = (tuple(parameters), gradient)
+    if key not in self._parametric_lambdas:
+      source = self.parametric_source(parameters, gradient)
+      self._parametric_lambdas[key] = compile_numpy(source, "gradient" if gradient else "operad")
+    return self._parametric_lambdas[key]
+
+  def as_numpy_module(self, name="field", parameters=None, gradient=False, description=None):
+    """Source of a standalone python module defining name(x, y, z), and gradient(x, y, z) with gradient, which only
+    needs NumPy to import. Free symbols named in parameters are keyword arguments defaulting to their values."""
+    functions = [(name, self.flattened)]
+    if gradient:
+      functions.append(("gradient", symbolic_gradient(self.flattened)))
+    return numpy_module(functions, parameters, description or self.functional_namespace or "a functional")
+
+  def bind(self, **values):
+    """The functional with its free parameter symbols bound to values, evaluated with NumPy."""
+    return BoundFunctional(self, values)
 
   def __mul__(self, other):
     @Expression
@@ -79,3 +142,65 @@ class Functional(Operad, Algebra):
       super().__lshift__(other)
 
 convert_to_functional = partial(convert_to_operad, Functional)
+
+class BoundFunctional:
+  """A Functional with parameter symbols bound to values. Source is generated and compiled once per parametric
+  functional, binding other values only changes the arguments it is called with."""
+  def __init__(self, functional, values):
+    self.functional = functional
+    self.parameters = tuple(sorted([s for s in functional.flattened.free_symbols if s.name in values], key=str))
+    self.values = dict([(s.name, float(values[s.name])) for s in self.parameters])
+    self._lipschitz = None
+    self._compiled_c = None
+
+  def bind(self, **values):
+    return BoundFunctional(self.functional, {**self.values, **values})
+
+  @property
+  def arguments(self):
+    return [str(a) for a in (x, y, z) + self.parameters]
+
+  @property
+  def numpy_source(self):
+    return bind_numpy(self.functional.parametric_source(self.parameters), "operad", self.arguments, self.values)
+
+  @property
+  def gradient_source(self):
+    source = self.functional.parametric_source(self.parameters, gradient=True)
+    return bind_numpy(source, "gradient", self.arguments, self.values)
+
+  @property
+  def c_source(self):
+    # Values are compiled in, so every binding is a library of its own
+    return ccodegen(substitute(self.functional.flattened, self.values))
+
+  @property
+  def compiled_c(self):
+    if self._compiled_c is None:
+      self._compiled_c = CompiledC(self.c_source)
+    return self._compiled_c
+
+  def __call__(self, X, Y, Z):
+    X, Y, Z = np.broadcast_arrays(X, Y, Z)
+    return np.broadcast_to(self.functional.parametric_lambda(self.parameters)(X, Y, Z, **self.values), X.shape)
+
+  def gradient(self, X, Y, Z):
+    X, Y, Z = np.broadcast_arrays(X, Y, Z)
+    evaluated = self.functional.parametric_lambda(self.parameters, gradient=True)(X, Y, Z, **self.values)
+    return np.array([np.broadcast_to(g, X.shape) for g in evaluated])
+
+  def interval(self, X, Y, Z):
+    bindings = coordinates(X, Y, Z)
+    for symbol in self.parameters:
+      bindings[symbol] = self.values[symbol.name]
+    return evaluate_interval(self.functional.flattened, bindings)
+
+  @property
+  def lipschitz(self):
+    if self._lipschitz is None:
+      self._lipschitz = self.functional.lipschitz_bounds(parameters=self.values)[0]
+    return self._lipschitz
+
+  @lipschitz.setter
+  def lipschitz(self, value):
+    self._lipschitz = value
@@ -1,6 +1,15 @@
-import tensorflow as tf
+import re
+import sympy
 import inspect
 from numbers import Number
+from collections import OrderedDict
+from dendrite.codegen.glsl_codegen import CodeGenError
+
+# TypeErrors sympy raises when a symbol is used where only a number can be: compared, converted, used as a count
+symbolic_failure = re.compile(r"Symbol|Relational|symbol|can't convert expression")
+
+# Stands for a parametric functional which can't be built, as opposed to None for one not built yet
+unbuildable = object()
 
 class Geometry:
   def __init__(self, function, expose_parameters=True):
@@ -21,23 +30,110 @@ class Geometry:
       else:
         self.parameters[name] = param.default
 
+    # Functionals are built once, exposed parameters are inputs to them rather than part of their structure
+    self._functionals = {}
+    self._parametric_functional = None
+
   def __call__(self, **kwargs):
+    self.set_parameters(**kwargs)
+    return self.functional
+
+  def exposed(self, name):
+    return self.expose_parameters and isinstance(self.parameters[name], Number)
+
+  def set_parameters(self, **kwargs):
     for k, v in kwargs.items():
+      if not (self.exposed(k) and isinstance(v, Number)):
+        # Other parameters change the structure of the functional, which is rebuilt on next access
+        self._functionals = {}
+        self._parametric_functional = None
       self.parameters[k] = v
-    return self.functional
 
   @property
-  def functional(self):
-    self.placeholders = {}
-    arguments = {}
-    for name, param in self.parameters.items():
-      if self.expose_parameters and isinstance(param, Number):
-        placeholder = tf.placeholder(tf.float32, shape=(), name=name)
-        self.placeholders[name] = placeholder
-        arguments[name] = placeholder
-      else:
-        arguments[name] = param
+  def parametric_functional(self):
+    # Built with a real symbol standing for every exposed parameter, or None if the function needs their values
+    if self._parametric_functional is None:
+      arguments = {}
+      for name, param in self.parameters.items():
+        arguments[name] = sympy.Symbol(name, real=True) if self.exposed(name) else param
+      try:
+        functional = self.function(**arguments)
+        functional.functional_namespace = self.name.title()
+        functional.flattened
+      except TypeError as error:
+        # e.g. parameters compared or used as counts, which only numbers can be. Other errors are the model's own
+        if not (self.uniforms and symbolic_failure.search(str(error))):
+          raise
+        functional = unbuildable
+      self._parametric_functional = functional
+    if self._parametric_functional is unbuildable:
+      return None
+    return self._parametric_functional
 
-    functional = self.function(**arguments)
+  @property
+  def numeric_functional(self):
+    # Parameters bound to their current values, for calculations evaluated without TensorFlow.
+    # Binding reuses the source and compiled functions of the parametric functional
+    functional = self.parametric_functional
+    if functional is not None:
+      return functional.bind(**dict([(name, self.parameters[name]) for name in self.parameters if self.exposed(name)]))
+
+    functional = self.function(**self.parameters)
     functional.functional_namespace = self.name.title()
     return functional
+
+  @property
+  def uniforms(self):
+    # Names of the GLSL uniforms exposed parameters are read from
+    return OrderedDict([(name, "u_" + name) for name in sorted(self.parameters) if self.exposed(name)])
+
+  def as_glsl(self, name="field"):
+    """GLSL source defining name(vec3 p), reading exposed parameters from uniforms, so changing them needs no
+    code generation or shader compilation."""
+    functional = self.parametric_functional
+    if functional is None:
+      raise CodeGenError("Parameters of %s must be numbers to be uniforms" % self.name)
+    return functional.as_glsl(name, self.uniforms)
+
+  def glsl_manifest(self, name="field"):
+    """Describes the function and uniforms of as_glsl, with the current parameter values to set them to."""
+    return {
+      "function": name,
+      "uniforms": OrderedDict([
+        (parameter, {"uniform": uniform, "type": "float", "value": float(self.parameters[parameter])})
+        for parameter, uniform in self.uniforms.items()
+      ])
+    }
+
+  def as_numpy_module(self, name="field", gradient=False):
+    """Source of a standalone python module evaluating the geometry with NumPy, to be imported without building it.
+    Exposed parameters are keyword arguments defaulting to their current values, others are part of the source."""
+    functional = self.parametric_functional
+    if functional is None:
+      return self.numeric_functional.as_numpy_module(name, gradient=gradient, description=self.name)
+    parameters = dict([(parameter, self.parameters[parameter]) for parameter in self.uniforms])
+    return functional.as_numpy_module(name, parameters, gradient, self.name)
+
+  @property
+  def functional(self):
+    import tensorflow as tf
+
+    # Built once per TensorFlow graph, placeholders are fed the current parameter values on every run
+    graph = tf.get_default_graph()
+    if graph not in self._functionals:
+      placeholders = {}
+      arguments = {}
+      for name, param in self.parameters.items():
+        if self.exposed(name):
+          placeholder = tf.placeholder(tf.float32, shape=(), name=name)
+          placeholders[name] = placeholder
+          arguments[name] = placeholder
+        else:
+          arguments[name] = param
+
+      functional = self.function(**arguments)
+      functional.functional_namespace = self.name.title()
+      self._functionals[graph] = (functional, placeholders)
+
+    functional, self.placeholders = self._functionals[graph]
+    return functional
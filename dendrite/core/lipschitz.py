@@ -0,0 +1,152 @@
+import warnings
+import numpy as np
+import sympy
+from sympy.abc import x, y, z
+from dendrite.codegen.glsl_codegen import CodeGenError, CodeGenArgumentListError
+
+# Lipschitz bounds are propagated through expressions by structural rules, each returning a pair
+# (bound, coordinates) of an upper bound on the gradient norm and the coordinates the expression depends on.
+# Rules return None where no bound is known, callers then treat the bound as infinite, and sphere tracing estimates
+# one by sampling unless it is overridden.
+
+coordinates = (x, y, z)
+
+def dependencies(expr, children):
+  variables = set(expr.free_symbols & set(coordinates))
+  for symbol in expr.free_symbols & set(children):
+    variables |= children[symbol][1]
+  return frozenset(variables)
+
+def linear_coefficients(expr):
+  # Gradient of expr if it is affine in the coordinates with numeric coefficients
+  if not expr.free_symbols <= set(coordinates) or not isinstance(expr, (sympy.Add, sympy.Mul, sympy.Symbol)):
+    return None
+  try:
+    polynomial = sympy.Poly(expr, *coordinates)
+  except sympy.PolynomialError:
+    return None
+  if polynomial.total_degree() > 1:
+    return None
+  return np.array([float(polynomial.coeff_monomial(c)) for c in coordinates])
+
+def constant_value(expr):
+  try:
+    return float(expr)
+  except TypeError:
+    return None
+
+def squared_terms(expr):
+  # Terms of c * g**2 with nonnegative constant c, as pairs (sqrt(c), g)
+  terms = []
+  for term in sympy.Add.make_args(expr):
+    coefficient, factor = term.as_coeff_Mul()
+    if not isinstance(factor, sympy.Pow) or factor.exp != 2 or coefficient < 0:
+      return None
+    terms.append((np.sqrt(float(coefficient)), factor.base))
+  return terms
+
+def root_sum_squares(expr, children):
+  # |grad sqrt(sum g_i**2)| <= sqrt(sum L_i**2) by Cauchy-Schwarz,
+  # and <= max L_i when the g_i depend on disjoint coordinates, since their gradients are then orthogonal
+  terms = squared_terms(expr.base)
+  if terms is None:
+    return None
+  bounds = [expression_bound(g, children) for _, g in terms]
+  if any([b is None for b in bounds]):
+    return None
+  scaled = [c * b for (c, _), (b, _) in zip(terms, bounds)]
+  variables = [v for _, v in bounds]
+  if pairwise_disjoint(variables):
+    return max(scaled), frozenset().union(*variables)
+  return float(np.sqrt(np.sum(np.square(scaled)))), frozenset().union(*variables)
+
+def pairwise_disjoint(sets):
+  return sum([len(s) for s in sets]) == len(frozenset().union(*sets))
+
+# Functions with derivative bounded by 1. Piecewise constant functions (floor, sign, ...) are discontinuous, so no
+# bound holds across their jumps, and they are left unknown
+contractions = (sympy.sin, sympy.cos, sympy.atan, sympy.tanh, sympy.Abs)
+
+def expression_bound(expr, children):
+  """Bounds the Lipschitz constant of expr, where children maps symbols standing for child Operads
+  to their (bound, coordinates)."""
+  variables = dependencies(expr, children)
+  if not variables:
+    return 0, variables
+  if expr in coordinates:
+    return 1, variables
+  if expr in children:
+    return children[expr]
+
+  coefficients = linear_coefficients(expr)
+  if coefficients is not None:
+    return float(np.linalg.norm(coefficients)), variables
+
+  if isinstance(expr, sympy.Add):
+    bounds = [expression_bound(arg, children) for arg in expr.args]
+    if any([b is None for b in bounds]):
+      return None
+    return sum([b for b, _ in bounds]), variables
+  elif isinstance(expr, sympy.Mul):
+    constant = [arg for arg in expr.args if not dependencies(arg, children)]
+    varying = [arg for arg in expr.args if dependencies(arg, children)]
+    scale = constant_value(sympy.Mul(*constant))
+    bound = expression_bound(sympy.Mul(*varying), children) if len(varying) == 1 else None
+    if scale is None or bound is None:
+      return None
+    return abs(scale) * bound[0], variables
+  elif isinstance(expr, sympy.Pow):
+    if expr.exp == sympy.Rational(1, 2):
+      return root_sum_squares(expr, children)
+    return None
+  elif isinstance(expr, (sympy.Min, sympy.Max)):
+    bounds = [expression_bound(arg, children) for arg in expr.args]
+    if any([b is None for b in bounds]):
+      return None
+    return max([b for b, _ in bounds]), variables
+  elif isinstance(expr, contractions):
+    return expression_bound(expr.args[0], children)
+  return None
+
+def transformation_bound(components, children):
+  """Bounds the operator norm of the Jacobian of a transformation with the given components."""
+  bounds = [expression_bound(c, children) for c in components]
+  if any([b is None for b in bounds]):
+    return None
+  variables = [v for _, v in bounds]
+  if pairwise_disjoint(variables):
+    return max([b for b, _ in bounds]), frozenset().union(*variables)
+
+  gradients = [linear_coefficients(c) for c in components]
+  if all([g is not None for g in gradients]):
+    return float(np.linalg.norm(np.array(gradients), 2)), frozenset().union(*variables)
+  return float(np.sqrt(np.sum(np.square([b for b, _ in bounds])))), frozenset().union(*variables)
+
+def estimate_lipschitz(functional, bounds, samples=4096, safety=2.0, seed=0):
+  """Estimates a Lipschitz bound of functional within bounds from the largest gradient norm at uniformly sampled
+  points, times safety. Features narrower than the samples are missed, so the estimate is not guaranteed."""
+  points = np.random.RandomState(seed).uniform(bounds[0], bounds[1], (samples, 3)).T
+  norms = np.sqrt(np.sum(np.square(functional.gradient(*points)), axis=0))
+  return safety * float(np.max(norms[np.isfinite(norms)], initial=0))
+
+default_bounds = [[-1, -1, -1], [1, 1, 1]]
+
+def step_bound(functional, bounds=default_bounds, strict=False):
+  """The Lipschitz bound sphere tracing steps by |F| / bound with. Where the propagation rules give none, it is
+  estimated by sampling within bounds with a warning, or with strict a ValueError is raised."""
+  bound = functional.lipschitz
+  if np.isfinite(bound):
+    return bound
+  if strict:
+    raise ValueError("No Lipschitz bound is known for this functional, set its lipschitz")
+
+  try:
+    bound = estimate_lipschitz(functional, bounds)
+  except (CodeGenError, CodeGenArgumentListError):
+    # e.g. time dependent functionals, which have no NumPy gradient
+    bound = None
+  if bound is None or not np.isfinite(bound) or bound <= 0:
+    bound = 1.0
+  warnings.warn("No Lipschitz bound is known for this functional, stepping with %g. "
+    "Set its lipschitz for a guaranteed bound" % bound)
+  return bound
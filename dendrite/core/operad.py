@@ -1,9 +1,42 @@
+import re
+import math
 import sympy
-import tensorflow as tf
+import hashlib
+import numpy as np
+from numbers import Number
 from sympy.abc import x, y, z, t
 from collections import OrderedDict
-from dendrite.utils.tensorflow_utils import *
-from dendrite.codegen.glsl_codegen import glslcodegen
+from dendrite.codegen.glsl_codegen import glslcodegen, glsl_function, glsl_module, CodeGenError
+from dendrite.codegen.numpy_codegen import numpycodegen, compile_numpy
+from dendrite.core.substitution import substitute, compose
+from dendrite.mathematics.interval import evaluate_interval, coordinates
+from dendrite.core.lipschitz import expression_bound, transformation_bound
+from dendrite.utils.compilation_cache import compilation_cache, dump_expression, load_expression
+from dendrite.utils.tensors import is_tensor
+
+def canonical_form(value):
+  # Stable textual form of an Operad input, used to hash-cons structurally identical subtrees
+  if isinstance(value, Operad):
+    return value.structural_hash
+  elif value is None or isinstance(value, (sympy.Basic, Number, str)):
+    return sympy.srepr(value)
+  elif isinstance(value, np.ndarray):
+    return "ndarray(%s, %s, %s)" % (value.dtype, value.shape, canonical_form(value.tolist()))
+  elif isinstance(value, (tuple, list)):
+    return "%s(%s)" % (type(value).__name__, ", ".join([canonical_form(v) for v in value]))
+  else:
+    # Opaque values (e.g. placeholders) are only shared by identity, and can not be persisted
+    return "opaque:%s@%d" % (type(value).__name__, id(value))
+
+def glsl_identifier(namespace, index):
+  identifier = "%s_%d" % (re.sub(r"\W", "_", str(namespace).lower()), index)
+  # Namespaces of numeric constants would start with a digit
+  return identifier if re.match(r"[a-z]", identifier) else "f_" + identifier
+
+def is_constant(operad):
+  # Numbers and parameters, which are inlined into generated source rather than called
+  expression = operad.expression
+  return not operad.inputs and isinstance(expression, sympy.Expr) and not expression.free_symbols & set([x, y, z, t])
 
 class Operad:
   def __init__(self, expression, namespace=None, to_minimize=None, time_bounds=None):
@@ -11,51 +44,195 @@ class Operad:
     self._to_minimize = to_minimize
     self._time_bounds = time_bounds
     self._symbolic_lambda = None
+    self._numpy_lambda = None
+    self._flattened = None
+    self._structural_hash = None
+    self._persistent = None
+    self._lipschitz_bound = None
+    self._lipschitz_override = None
     self.inputs = {}
     self.namespace = namespace
     self.functional_namespace = None
 
   def set_inputs(self, **inputs):
     self.inputs = {**inputs, **self.inputs}
+    self._flattened = None
+    self._structural_hash = None
+    self._persistent = None
+    self._lipschitz_bound = None
+
+  @property
+  def structural_hash(self):
+    # Structurally identical subtrees hash equally, so every traversal treats the tree as a DAG
+    # and evaluates shared subtrees once. Namespaces only affect naming, and are not hashed.
+    if self._structural_hash is None:
+      components = [
+        type(self).__name__,
+        canonical_form(self.expression),
+        canonical_form(self._to_minimize),
+        canonical_form(self._time_bounds)
+      ]
+      for name in sorted(self.inputs):
+        components.append(name + "=" + canonical_form(self.inputs[name]))
+      text = "\n".join(components)
+      self._structural_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+      self._persistent = "opaque:" not in text and all([
+        value.persistent for value in self.inputs.values() if isinstance(value, Operad)
+      ])
+    return self._structural_hash
 
-  def __call__(self, X=x, Y=y, Z=z, scope=None, functional_scope=None):
-    if any([isinstance(c, (tf.Variable, tf.Tensor)) for c in [X, Y, Z]]):
-      return self.compute_tensorflow(X, Y, Z, scope=scope, functional_scope=functional_scope)
+  @property
+  def persistent(self):
+    # Whether the structural hash is stable across processes, so compiled artifacts can be cached on disk
+    self.structural_hash
+    return self._persistent
+
+  def cached(self, backend, compute, dump=str, load=str):
+    if not self.persistent:
+      return compute()
+    key = compilation_cache.key(self.structural_hash, backend)
+    return compilation_cache.fetch(key, compute, dump, load)
+
+  def __call__(self, X=x, Y=y, Z=z, scope=None, functional_scope=None, cache=None):
+    if any([is_tensor(c) for c in [X, Y, Z]]):
+      return self.compute_tensorflow(X, Y, Z, scope=scope, functional_scope=functional_scope, cache=cache)
+    if any([isinstance(c, np.ndarray) for c in [X, Y, Z]]):
+      return self.compute_numpy(X, Y, Z)
     return self.symbolic_lambda(X, Y, Z)
 
+  @property
+  def flattened(self):
+    if self._flattened is None:
+      self._flattened = self.cached("flattened", self.substitute_symbols, dump_expression, load_expression)
+    return self._flattened
+
   @property
   def symbolic_lambda(self):
     if self._symbolic_lambda is None:
-      substituted = self.substitute_symbols()
-      if isinstance(substituted, sympy.Subs):
-        substituted = substituted.doit()
-      self._symbolic_lambda = sympy.lambdify([x,y,z], substituted, "sympy")
+      self._symbolic_lambda = sympy.lambdify([x,y,z], self.flattened, "sympy")
     return self._symbolic_lambda
 
-  def substitute_symbols(self):
-    substitute_dict = {}
+  @property
+  def numpy_source(self):
+    # Subtrees shared across the tree are emitted once, so each is evaluated once per grid
+    return self.cached("numpy", lambda: numpycodegen(("operad", self.flattened), cse=True))
+
+  @property
+  def numpy_lambda(self):
+    # Compiled once per Operad, then evaluated over whole arrays in a single vectorized pass
+    if self._numpy_lambda is None:
+      self._numpy_lambda = compile_numpy(self.numpy_source, "operad")
+    return self._numpy_lambda
+
+  def compute_numpy(self, X, Y, Z):
+    X, Y, Z = np.broadcast_arrays(X, Y, Z)
+    evaluated = self.numpy_lambda(X, Y, Z)
+
+    # Constant expressions evaluate to scalars, fill them out to the shape of the inputs
+    dtype = np.result_type(X, np.float32)
+    fill = lambda value: value if np.shape(value) == X.shape else np.full(X.shape, value, dtype=dtype)
+    if isinstance(evaluated, tuple):
+      return tuple([fill(e) for e in evaluated])
+    return fill(evaluated)
+
+  def interval(self, X, Y, Z):
+    # Guaranteed bounds over axis aligned boxes, X, Y and Z are Intervals or (lo, hi) pairs of arrays
+    return evaluate_interval(self.flattened, coordinates(X, Y, Z))
+
+  @property
+  def lipschitz(self):
+    # Upper bound on the gradient norm, so stepping a ray by |F| / lipschitz never crosses the surface.
+    # Infinite where the propagation rules can not bound some node
+    if self._lipschitz_override is not None:
+      return self._lipschitz_override
+    if self._lipschitz_bound is None:
+      self._lipschitz_bound = self.lipschitz_bounds()
+    return self._lipschitz_bound[0]
+
+  @lipschitz.setter
+  def lipschitz(self, value):
+    # Overrides the estimate, for nodes the propagation rules can not bound
+    self._lipschitz_override = value
+
+  def lipschitz_bounds(self, memo=None, parameters=None):
+    # memo maps structural hashes to (bound, coordinates depended on), shared subtrees are bounded once.
+    # parameters maps the names of free parameter symbols to the values they are bound to
+    if memo is None:
+      memo = {}
+    if self.structural_hash in memo:
+      return memo[self.structural_hash]
+
+    every_coordinate = frozenset([x, y, z])
+    if self._lipschitz_override is not None:
+      bound = (self._lipschitz_override, every_coordinate)
+    elif self._to_minimize is not None:
+      bound = None
+    elif type(self.expression) == sympy.Subs:
+      f = self.inputs["f"].lipschitz_bounds(memo, parameters)
+      g = self.inputs["g"].lipschitz_bounds(memo, parameters)
+      bound = (f[0] * g[0], g[1]) if f[1] else (0, frozenset())
+    else:
+      children = {}
+      constants = {}
+      for name, value in self.inputs.items():
+        if isinstance(value, Operad):
+          child = value.lipschitz_bounds(memo, parameters)
+          if child[1]:
+            children[sympy.Symbol(name)] = child
+          else:
+            constants[name] = value.flattened
+        elif isinstance(value, (Number, sympy.Basic, np.ndarray)):
+          constants[name] = value
+      expression = substitute(self.expression, constants)
+      if parameters:
+        expression = substitute(expression, parameters)
+      if isinstance(expression, tuple):
+        bound = transformation_bound(expression, children)
+      else:
+        bound = expression_bound(expression, children)
+
+    if bound is None:
+      # Without a rule nothing is known, until the bound is overridden
+      bound = (math.inf, every_coordinate)
+    memo[self.structural_hash] = bound
+    return bound
+
+  def substitute_symbols(self, memo=None):
+    # memo maps structural hashes to substituted subtrees, shared subtrees are substituted once
+    if memo is None:
+      memo = {}
+    if self.structural_hash in memo:
+      return memo[self.structural_hash]
 
     if type(self.expression) == sympy.Subs:
-      gx, gy, gz = self.inputs["g"].substitute_symbols()
-      g0, g1, g2 = self.expression.args[2]
-      f = self.inputs["f"].substitute_symbols()
-      return self.expression.subs({"f": f, g0: gx, g1: gy, g2: gz}, simultaneous=True)
+      f = self.inputs["f"].substitute_symbols(memo)
+      g = self.inputs["g"].substitute_symbols(memo)
+      substituted = compose(f, g)
     else:
+      substitute_dict = {}
       for name, value in self.inputs.items():
         if isinstance(value, Operad):
-          substitute_dict[name] = value.substitute_symbols()
+          substitute_dict[name] = value.substitute_symbols(memo)
         else:
           substitute_dict[name] = value
+      substituted = substitute(self.expression, substitute_dict)
+
+    memo[self.structural_hash] = substituted
+    return substituted
 
-    def substitute(expr, subs):
-      if isinstance(expr, tuple):
-        return tuple([substitute(e, subs) for e in expr])
-      # Use symbolic lambda instead of expr.subs; subs attempts to simplify at every step, causing much slow
-      return sympy.lambdify(subs.keys(), expr, "sympy")(**subs)
+  def compute_tensorflow(self, X, Y, Z, scope=None, functional_scope=None, cache=None):
+    # cache maps (subtree, input tensors) to output tensors, so shared subtrees are emitted once per grid
+    if cache is None:
+      cache = {}
+    key = (self.structural_hash, id(X), id(Y), id(Z))
+    if key not in cache:
+      cache[key] = self.emit_tensorflow(X, Y, Z, scope=scope, functional_scope=functional_scope, cache=cache)
+    return cache[key]
 
-    return substitute(self.expression, substitute_dict)
+  def emit_tensorflow(self, X, Y, Z, scope=None, functional_scope=None, cache=None):
+    import tensorflow as tf
+    from dendrite.utils.tensorflow_utils import newtons_method, bisection_method
 
-  def compute_tensorflow(self, X, Y, Z, scope=None, functional_scope=None):
     namespace = self.namespace or scope
 
     if self.functional_namespace and functional_scope:
@@ -68,9 +245,9 @@ class Operad:
       with tf.name_scope(functional_namespace) as functional_scope:
         with tf.name_scope(namespace) as scope:
           if type(self.expression) == sympy.Subs:
-            gx, gy, gz = self.inputs["g"](X, Y, Z, scope=scope, functional_scope=functional_scope)
+            gx, gy, gz = self.inputs["g"](X, Y, Z, scope=scope, functional_scope=functional_scope, cache=cache)
             f = self.inputs["f"]
-            return f(gx, gy, gz, scope=scope, functional_scope=functional_scope)
+            return f(gx, gy, gz, scope=scope, functional_scope=functional_scope, cache=cache)
 
           input_tensors = OrderedDict()
           for sym, tens in zip([x,y,z], [X,Y,Z]):
@@ -78,7 +255,7 @@ class Operad:
 
           for name, value in self.inputs.items():
             if isinstance(value, Operad):
-              input_tensors[name] = value(X, Y, Z, scope=scope, functional_scope=functional_scope)
+              input_tensors[name] = value(X, Y, Z, scope=scope, functional_scope=functional_scope, cache=cache)
             elif isinstance(value, sympy.Basic):
               input_tensors[name] = sympy.lambdify([x, y, z], value, "tensorflow")(X, Y, Z)
             else:
@@ -104,20 +281,62 @@ class Operad:
 
   @property
   def glsl_code(self):
-    return glslcodegen((self.namespace.lower(), self.expression))
-
-  def as_glsl(self):
-    glsl_funcs = {}
-    if isinstance(self.expression, sympy.Subs):
-      glsl_f = self.inputs["g"].glsl_code
-      glsl_g = self.inputs["f"].glsl_code
-      # glsl_funcs[self] =
-    else:
-      glsl_funcs[self] = self.glsl_code
+    name = self.namespace.lower()
+    return self.cached("glsl:" + name, lambda: glslcodegen((name, self.expression)))
+
+  def as_glsl(self, name="field", uniforms=None):
+    """GLSL source defining name(vec3 p), which evaluates the Operad. Every unique subtree is emitted as one
+    function of p, called wherever the subtree is shared. uniforms maps the names of free parameter symbols
+    to the names of float uniforms they are read from."""
+    uniforms = uniforms or {}
+    declared = [uniforms[parameter] for parameter in sorted(uniforms)]
+    compute = lambda: glsl_module(*self.glsl_functions(name, uniforms=uniforms), uniforms=declared)
+    return self.cached("glsl_module:" + ",".join([name] + declared), compute)
+
+  @property
+  def glsl_datatype(self):
+    if type(self.expression) == sympy.Subs:
+      return self.inputs["f"].glsl_datatype
+    return "vec3" if isinstance(self.expression, tuple) else "float"
 
-      for d in self.inputs.values():
-        if isinstance(d, Operad):
-          glsl_funcs[d] = d.as_glsl()
+  def glsl_functions(self, name=None, functions=None, constants=None, uniforms=None):
+    # functions maps structural hashes to (function name, source), children are emitted before their parents
+    is_root = functions is None
+    if is_root:
+      functions = OrderedDict()
+      constants = set()
+    if self.structural_hash in functions:
+      return functions[self.structural_hash][0]
+    if self._to_minimize is not None:
+      raise CodeGenError("Time dependent Operads can not be emitted as GLSL: " + str(self.namespace))
+
+    if type(self.expression) == sympy.Subs:
+      g = self.inputs["g"].glsl_functions(None, functions, constants, uniforms)
+      f = self.inputs["f"].glsl_functions(None, functions, constants, uniforms)
+      name = name or glsl_identifier(self.namespace, len(functions))
+      source = "%s %s(vec3 p) {\n  return %s(%s(p));\n}\n" % (self.glsl_datatype, name, f, g)
+    else:
+      local_vars = []
+      substitute_dict = {}
+      for input_name, value in sorted(self.inputs.items()):
+        if isinstance(value, Operad) and is_constant(value):
+          substitute_dict[input_name] = value.expression
+        elif isinstance(value, Operad):
+          child = value.glsl_functions(None, functions, constants, uniforms)
+          local_vars.append((value.glsl_datatype, "in_" + input_name, child + "(p)"))
+          substitute_dict[input_name] = sympy.Symbol("in_" + input_name)
+        elif is_tensor(value):
+          raise CodeGenError("Tensor inputs can not be emitted as GLSL: " + input_name)
         else:
-          glsl_funcs[d] = str(d)
-    return "\n".join(glsl_funcs.values())
+          substitute_dict[input_name] = value
+      name = name or glsl_identifier(self.namespace, len(functions))
+      expression = substitute(self.expression, substitute_dict)
+      if uniforms:
+        expression = substitute(expression, dict([(p, sympy.Symbol(u)) for p, u in uniforms.items()]))
+      source, used = glsl_function(name, expression, local_vars)
+      constants |= used
+    functions[self.structural_hash] = (name, source)
+
+    if is_root:
+      return [source for _, source in functions.values()], constants
+    return name
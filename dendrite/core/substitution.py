@@ -0,0 +1,56 @@
+import sympy
+import numpy as np
+from sympy.abc import x, y, z
+
+# Flattening an Operad tree rewrites the expression of every node once, children first.
+# rewrite rebuilds an expression in a single memoized pass, without the simplification attempted at every step
+# by expr.subs, or the source generation and exec of sympy.lambdify, so flattening is linear in tree size.
+
+def sympify_input(value):
+  if isinstance(value, tuple):
+    return tuple([sympify_input(v) for v in value])
+  elif isinstance(value, np.ndarray):
+    return sympy.ImmutableMatrix(value.tolist())
+  elif isinstance(value, np.generic):
+    return sympy.sympify(value.item())
+  return sympy.sympify(value)
+
+def rewrite(expr, replacements, memo=None):
+  """Post-order rewrite of expr replacing the subexpressions found in replacements, like expr.xreplace."""
+  if memo is None:
+    memo = {}
+  if expr in replacements:
+    return replacements[expr]
+  if expr in memo:
+    return memo[expr]
+
+  args = [rewrite(arg, replacements, memo) for arg in expr.args]
+  if all([new is old for new, old in zip(args, expr.args)]):
+    rewritten = expr
+  elif isinstance(expr, (sympy.Min, sympy.Max)):
+    # Evaluating Min and Max compares every pair of arguments looking for redundancies,
+    # which is quadratic in the size of the arguments and would dominate flattening
+    rewritten = expr.func(*args, evaluate=False)
+  else:
+    rewritten = expr.func(*args)
+
+  memo[expr] = rewritten
+  return rewritten
+
+def substitute(expr, subs):
+  """Replaces the symbols and matrix symbols named by the keys of subs in expr, or a tuple of exprs."""
+  if isinstance(expr, tuple):
+    return tuple([substitute(e, subs) for e in expr])
+
+  expr = sympy.sympify(expr)
+  replacements = {}
+  for symbol in expr.free_symbols:
+    if isinstance(symbol, (sympy.Symbol, sympy.MatrixSymbol)) and symbol.name in subs:
+      replacements[symbol] = sympify_input(subs[symbol.name])
+  return rewrite(expr, replacements)
+
+def compose(f, g):
+  """Replaces the coordinates x, y, z of f, an expr or a tuple of exprs, with the components of g."""
+  if isinstance(f, tuple):
+    return tuple([compose(e, g) for e in f])
+  return rewrite(sympy.sympify(f), dict(zip([x, y, z], sympify_input(tuple(g)))))
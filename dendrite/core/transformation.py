@@ -11,7 +11,7 @@ class Transformation(Operad):
   def __lshift__(self, other):
     if isinstance(other, Transformation):
       @Expression
-      def composition(f: transformation_lambda, g: transformation_lambda) -> Functional:
+      def composition(f: transformation_lambda, g: transformation_lambda) -> Transformation:
         return sympy.Subs(f.expr, f.variables, g.expr)
       return composition(self, other)
     else:
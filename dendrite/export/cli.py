@@ -0,0 +1,88 @@
+import struct
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dendrite.codegen.numpy_codegen import compile_numpy
+from dendrite.calculation.grid import grid_coordinates
+
+# Common Layer Interface export, slicing the functional directly at every layer height.
+# Each layer is evaluated on its own 2D grid and contoured, then written before the next layer is evaluated,
+# so memory is proportional to a single layer rather than the volume.
+
+unit = 0.001 # 0.001mm
+
+layer_command = 127 # Start layer long, with the height as a real
+polyline_command = 130 # Polyline long, with id, direction and point count as integers
+
+def layer_heights(resolution, bounds):
+  return np.linspace(bounds[0][2], bounds[1][2], resolution[2])
+
+def layer_contours(function, height, resolution, bounds):
+  """Contours of function(x, y, height) = 0, as arrays of (x, y) points in space."""
+  from skimage import measure
+
+  shape = tuple(resolution[:2])
+  indices = np.array(np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing="ij"))
+  X, Y = grid_coordinates(indices, shape, [bounds[0][:2], bounds[1][:2]])
+  layer = np.broadcast_to(function(X, Y, np.full(shape, height)), shape)
+  contours = measure.find_contours(layer, 0, fully_connected="high")
+  return [grid_coordinates(contour.T, shape, [bounds[0][:2], bounds[1][:2]]).T for contour in contours]
+
+slicer = {}
+
+def initialize_slicer(source, resolution, bounds):
+  slicer["function"] = compile_numpy(source, "operad")
+  slicer["resolution"] = resolution
+  slicer["bounds"] = bounds
+
+def slice_layer(height):
+  return layer_contours(slicer["function"], height, slicer["resolution"], slicer["bounds"])
+
+def slice_layers(functional, resolution, bounds, workers=None):
+  """Yields (height, contours) for every layer in order. With workers, layers are sliced by a pool of processes
+  compiling the generated NumPy source of the functional."""
+  heights = layer_heights(resolution, bounds)
+  if workers is None:
+    for height in heights:
+      yield height, layer_contours(functional, height, resolution, bounds)
+    return
+
+  initargs = (functional.numpy_source, resolution, bounds)
+  with ProcessPoolExecutor(workers, initializer=initialize_slicer, initargs=initargs) as executor:
+    for height, contours in zip(heights, executor.map(slice_layer, heights)):
+      yield height, contours
+
+def write_ascii_layer(file, height, contours):
+  file.write("$$LAYER/"+str(height)+"\n")
+  for j, contour in enumerate(contours):
+    points = ",".join(map(str, contour.reshape(-1).tolist()))
+    file.write("$$POLYLINE/"+str(j)+",1,"+str(len(contour))+","+points+"\n")
+
+def write_binary_layer(file, height, contours):
+  file.write(struct.pack("<Hf", layer_command, height))
+  for j, contour in enumerate(contours):
+    file.write(struct.pack("<Hiii", polyline_command, j, 1, len(contour)))
+    file.write(contour.astype("<f4").tobytes())
+
+def export_cli(path, functional, resolution, bounds, binary=False, workers=None):
+  with open(path, "wb" if binary else "w") as file:
+    header = [
+      "$$HEADERSTART",
+      "$$BINARY" if binary else "$$ASCII",
+      "$$UNITS/"+str(unit),
+      "$$LAYERS/"+str(resolution[2]),
+      "$$HEADEREND"
+    ]
+
+    if binary:
+      file.write(("\n".join(header) + "\n").encode("ascii"))
+    else:
+      file.write("\n".join(header + ["$$GEOMETRYSTART"]) + "\n")
+
+    for height, contours in slice_layers(functional, resolution, bounds, workers):
+      if binary:
+        write_binary_layer(file, height, contours)
+      else:
+        write_ascii_layer(file, height, contours)
+
+    if not binary:
+      file.write("$$GEOMETRYEND\n")
@@ -0,0 +1,99 @@
+import struct
+import numpy as np
+
+# Meshes are vertex arrays of shape (n, 3) and triangle index arrays of shape (m, 3), as returned by marching cubes,
+# with optional per-vertex normals of shape (n, 3). Writers encode in blocks, so the file is never held in memory at once.
+
+block_size = 2**20
+
+stl_triangle = np.dtype([
+  ("normal", "<f4", (3,)),
+  ("vertices", "<f4", (3, 3)),
+  ("attributes", "<u2")
+])
+
+def transform_vertices(vertices, resolution, bounds):
+  # Grid indices to coordinates, step sizes follow plotter.export_to_obj
+  step_size = (np.array(bounds[1], dtype=np.float64) - bounds[0]) / np.array(resolution)
+  return vertices * step_size + np.array(bounds[0], dtype=np.float64)
+
+def weld(vertices, triangles, tolerance=1e-6):
+  """Merges vertices closer than tolerance, dropping the triangles which degenerate as a result."""
+  keys = np.round(vertices / tolerance).astype(np.int64)
+  _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+  triangles = inverse.reshape(-1)[triangles]
+  degenerate = (triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) | (triangles[:, 0] == triangles[:, 2])
+  return vertices[first], triangles[~degenerate]
+
+def vertex_normals(functional, vertices):
+  # The gradient points into the solid, where functionals are positive
+  gradient = functional.gradient(*vertices.T).T
+  lengths = np.linalg.norm(gradient, axis=1, keepdims=True)
+  return -gradient / np.where(lengths > 0, lengths, 1)
+
+def face_normals(corners):
+  normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+  lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+  return normals / np.where(lengths > 0, lengths, 1)
+
+def write_stl(path, vertices, triangles, normals=None):
+  # STL stores face normals only
+  with open(path, "wb") as f:
+    f.write(b"dendrite".ljust(80, b" "))
+    f.write(struct.pack("<I", len(triangles)))
+    for start in range(0, len(triangles), block_size):
+      corners = vertices[triangles[start:start + block_size]]
+      block = np.zeros(len(corners), dtype=stl_triangle)
+      block["normal"] = face_normals(corners)
+      block["vertices"] = corners
+      f.write(block.tobytes())
+
+def write_ply(path, vertices, triangles, normals=None):
+  properties = ["x", "y", "z"] + (["nx", "ny", "nz"] if normals is not None else [])
+  header = "\n".join([
+    "ply",
+    "format binary_little_endian 1.0",
+    "element vertex %d" % len(vertices)
+  ] + ["property float %s" % p for p in properties] + [
+    "element face %d" % len(triangles),
+    "property list uchar int vertex_indices",
+    "end_header"
+  ]) + "\n"
+  face = np.dtype([("count", "u1"), ("indices", "<i4", (3,))])
+
+  with open(path, "wb") as f:
+    f.write(header.encode("ascii"))
+    for start in range(0, len(vertices), block_size):
+      block = vertices[start:start + block_size]
+      if normals is not None:
+        block = np.hstack([block, normals[start:start + block_size]])
+      f.write(block.astype("<f4").tobytes())
+    for start in range(0, len(triangles), block_size):
+      block = np.zeros(len(triangles[start:start + block_size]), dtype=face)
+      block["count"] = 3
+      block["indices"] = triangles[start:start + block_size]
+      f.write(block.tobytes())
+
+def write_obj(path, vertices, triangles, normals=None):
+  with open(path, "w") as f:
+    for start in range(0, len(vertices), block_size):
+      np.savetxt(f, vertices[start:start + block_size], fmt="v %.9g %.9g %.9g")
+    if normals is not None:
+      for start in range(0, len(normals), block_size):
+        np.savetxt(f, normals[start:start + block_size], fmt="vn %.6g %.6g %.6g")
+    # Indices are 1-based, vertex and normal indices coincide
+    face = "f %d//%d %d//%d %d//%d" if normals is not None else "f %d %d %d"
+    for start in range(0, len(triangles), block_size):
+      block = triangles[start:start + block_size] + 1
+      np.savetxt(f, np.repeat(block, 2, axis=1) if normals is not None else block, fmt=face)
+
+writers = {
+  "obj": write_obj,
+  "stl": write_stl,
+  "ply": write_ply
+}
+
+def export_mesh(path, vertices, triangles, format="obj", normals=None):
+  if format not in writers:
+    raise ValueError("Unknown mesh format: %s, expected one of %s" % (format, ", ".join(sorted(writers))))
+  writers[format](path, vertices, triangles, normals)
@@ -8,8 +8,14 @@ from dendrite.geometry.primitives.linear import plane
 from dendrite.transformations.affine import translate
 from dendrite.decorators.type_coercion import coerce_output
 from dendrite.mathematics.polynomials import *
+from dendrite.utils.compilation_cache import compilation_cache, dump_expression, load_expression
 
 def eliminate_variable(dependent, variable):
+  # Resultants dominate model construction, reuse them across processes
+  key = compilation_cache.key(sympy.srepr(dependent), sympy.srepr(variable), "resultant")
+  return compilation_cache.fetch(key, lambda: compute_resultant(dependent, variable), dump_expression, load_expression)
+
+def compute_resultant(dependent, variable):
   try:
     # coerce coefficients to rational due to https://github.com/sympy/sympy/issues/11507
     dependent = sympy.sympify(str(dependent), rational=True)
@@ -1,7 +1,29 @@
+import sympy
 from sympy import diff, integrate, Integral
 from dendrite.mathematics.elementary import sqrt
-from sympy.abc import t
+from sympy.abc import t, x, y, z
+
+# Derivatives of functions which are constant almost everywhere, such as floor in saw_wave, vanish
+piecewise_constant = (sympy.floor, sympy.ceiling, sympy.sign, sympy.Heaviside)
 
 def approximate_arc_length(curve, sum_terms=20):
   arc_length = Integral(sqrt(sum([diff(d, t)**2 for d in curve])), (t, 0, t))
   return arc_length.as_sum(sum_terms)
+
+def is_piecewise_constant_derivative(expr):
+  if isinstance(expr, sympy.Subs):
+    expr = expr.expr
+  return isinstance(expr, sympy.Derivative) and isinstance(expr.expr, piecewise_constant)
+
+def gradient(expr, coordinates=(x, y, z)):
+  """Symbolic gradient of expr with respect to coordinates, which are differentiated as real variables,
+  so that Abs, Min and Max differentiate to sign and Heaviside."""
+  real = [sympy.Dummy(c.name, real=True) for c in coordinates]
+  expr = sympy.sympify(expr).xreplace(dict(zip(coordinates, real)))
+  derivatives = []
+  for r in real:
+    derivative = diff(expr, r)
+    vanishing = [d for d in derivative.atoms(sympy.Subs, sympy.Derivative) if is_piecewise_constant_derivative(d)]
+    derivative = derivative.xreplace(dict([(d, sympy.S.Zero) for d in vanishing]))
+    derivatives.append(derivative.xreplace(dict(zip(real, coordinates))))
+  return tuple(derivatives)
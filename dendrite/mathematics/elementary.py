@@ -1,6 +1,6 @@
 import numpy as np
-import tensorflow as tf
 import sympy
+from dendrite.utils.tensors import is_tensor
 
 def factorial(n):
   if n==0:
@@ -28,7 +28,8 @@ def floor(t):
     return np.floor(t)
 
 def reduce_sum(t):
-  if isinstance(t, tf.Tensor):
+  if is_tensor(t):
+    import tensorflow as tf
     return tf.reduce_sum(t, reduction_indices=0)
   else:
     return np.sum(t, axis=0)
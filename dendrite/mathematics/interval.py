@@ -0,0 +1,237 @@
+import numpy as np
+import sympy
+from sympy.abc import x, y, z
+
+# Intervals hold arrays of lower and upper bounds, so a whole batch of boxes is evaluated in one vectorized pass.
+# Every operation rounds its bounds outward by one ulp, so the true range of an expression over a box is always
+# contained in its interval, whatever rounding numpy performed along the way.
+
+def round_down(a):
+  return np.nextafter(a, -np.inf)
+
+def round_up(a):
+  return np.nextafter(a, np.inf)
+
+class Interval:
+  def __init__(self, lo, hi=None):
+    lo = np.asarray(lo, dtype=np.float64)
+    hi = lo if hi is None else np.asarray(hi, dtype=np.float64)
+    self.lo, self.hi = np.broadcast_arrays(lo, hi)
+
+  @classmethod
+  def rounded(cls, lo, hi):
+    return cls(round_down(lo), round_up(hi))
+
+  @property
+  def shape(self):
+    return self.lo.shape
+
+  @property
+  def width(self):
+    return self.hi - self.lo
+
+  @property
+  def midpoint(self):
+    return (self.lo + self.hi) / 2
+
+  def contains(self, value):
+    return np.logical_and(self.lo <= value, value <= self.hi)
+
+  def __getitem__(self, index):
+    return Interval(self.lo[index], self.hi[index])
+
+  def __add__(self, other):
+    other = to_interval(other)
+    return Interval.rounded(self.lo + other.lo, self.hi + other.hi)
+
+  __radd__ = __add__
+
+  def __neg__(self):
+    return Interval(-self.hi, -self.lo)
+
+  def __sub__(self, other):
+    return self + (-to_interval(other))
+
+  def __rsub__(self, other):
+    return to_interval(other) - self
+
+  def __mul__(self, other):
+    other = to_interval(other)
+    with np.errstate(invalid="ignore"):
+      products = np.array([self.lo * other.lo, self.lo * other.hi, self.hi * other.lo, self.hi * other.hi])
+    # 0 * inf is nan, but zero times an unbounded interval is still zero
+    products[np.isnan(products)] = 0
+    return Interval.rounded(np.min(products, axis=0), np.max(products, axis=0))
+
+  __rmul__ = __mul__
+
+  def reciprocal(self):
+    # Dividing by an interval containing zero is unbounded
+    straddles = np.logical_and(self.lo <= 0, self.hi >= 0)
+    with np.errstate(divide="ignore"):
+      lo = np.where(straddles, -np.inf, 1 / self.hi)
+      hi = np.where(straddles, np.inf, 1 / self.lo)
+    return Interval.rounded(lo, hi)
+
+  def __truediv__(self, other):
+    return self * to_interval(other).reciprocal()
+
+  def __rtruediv__(self, other):
+    return to_interval(other) * self.reciprocal()
+
+  def __pow__(self, exponent):
+    if float(exponent).is_integer():
+      n = int(exponent)
+      if n < 0:
+        return (self ** -n).reciprocal()
+      elif n == 0:
+        return Interval(np.ones(self.shape))
+      elif n % 2 == 1:
+        return Interval.rounded(self.lo ** n, self.hi ** n)
+      else:
+        magnitude = abs(self)
+        return Interval.rounded(magnitude.lo ** n, magnitude.hi ** n).clip_below(0)
+    # Fractional powers are only defined for nonnegative bases, where they are monotonic
+    clipped = self.clip_below(0)
+    if exponent > 0:
+      return Interval.rounded(clipped.lo ** exponent, clipped.hi ** exponent)
+    return (clipped ** -exponent).reciprocal()
+
+  def __abs__(self):
+    lo = np.where(self.lo >= 0, self.lo, np.where(self.hi <= 0, -self.hi, 0))
+    hi = np.maximum(-self.lo, self.hi)
+    return Interval(lo, hi)
+
+  def clip_below(self, bound):
+    return Interval(np.maximum(self.lo, bound), np.maximum(self.hi, bound))
+
+  def __repr__(self):
+    return "Interval(%s, %s)" % (self.lo, self.hi)
+
+def to_interval(value):
+  if isinstance(value, Interval):
+    return value
+  if isinstance(value, tuple):
+    return Interval(*value)
+  return Interval(value)
+
+def minimum(*intervals):
+  return Interval(
+    np.minimum.reduce([i.lo for i in intervals]),
+    np.minimum.reduce([i.hi for i in intervals])
+  )
+
+def maximum(*intervals):
+  return Interval(
+    np.maximum.reduce([i.lo for i in intervals]),
+    np.maximum.reduce([i.hi for i in intervals])
+  )
+
+def monotonic(function, decreasing=False):
+  def apply(interval):
+    with np.errstate(invalid="ignore", divide="ignore"):
+      lo, hi = function(interval.lo), function(interval.hi)
+    if decreasing:
+      lo, hi = hi, lo
+    return Interval.rounded(lo, hi)
+  return apply
+
+def sin(interval):
+  # sin attains 1 at pi/2 + 2k*pi and -1 at -pi/2 + 2k*pi, wherever one of these lies within the interval
+  contains_extremum = lambda offset: np.ceil((interval.lo - offset) / (2 * np.pi)) <= np.floor((interval.hi - offset) / (2 * np.pi))
+  with np.errstate(invalid="ignore"):
+    lo, hi = np.sin(interval.lo), np.sin(interval.hi)
+  lower = np.where(contains_extremum(-np.pi / 2), -1, np.minimum(lo, hi))
+  upper = np.where(contains_extremum(np.pi / 2), 1, np.maximum(lo, hi))
+  # Unbounded intervals cover a full period
+  unbounded = ~np.isfinite(interval.width)
+  lower, upper = np.where(unbounded, -1, lower), np.where(unbounded, 1, upper)
+  return Interval(np.maximum(round_down(lower), -1), np.minimum(round_up(upper), 1))
+
+def cos(interval):
+  return sin(interval + np.pi / 2)
+
+def sqrt(interval):
+  return monotonic(np.sqrt)(interval.clip_below(0))
+
+exp = monotonic(np.exp)
+
+def log(interval):
+  return monotonic(np.log)(interval.clip_below(0))
+
+def floor(interval):
+  return Interval(np.floor(interval.lo), np.floor(interval.hi))
+
+def sign(interval):
+  return Interval(np.sign(interval.lo), np.sign(interval.hi))
+
+def domain_clipped(function, lower, upper, decreasing=False):
+  def apply(interval):
+    clipped = Interval(np.clip(interval.lo, lower, upper), np.clip(interval.hi, lower, upper))
+    return monotonic(function, decreasing)(clipped)
+  return apply
+
+interval_functions = {
+  sympy.sin: sin,
+  sympy.cos: cos,
+  sympy.floor: floor,
+  sympy.sign: sign,
+  sympy.Heaviside: monotonic(lambda a: np.heaviside(a, 0.5)),
+  sympy.exp: exp,
+  sympy.log: log,
+  sympy.atan: monotonic(np.arctan),
+  sympy.tanh: monotonic(np.tanh),
+  sympy.asin: domain_clipped(np.arcsin, -1, 1),
+  sympy.acos: domain_clipped(np.arccos, -1, 1, decreasing=True),
+  sympy.Abs: abs,
+}
+
+def evaluate_interval(expr, bindings, memo=None):
+  """Evaluates the sympy expr, or tuple of exprs, over the Intervals bound to its free symbols.
+
+  The result is guaranteed to contain every value expr takes for coordinates within the bound intervals.
+  """
+  if memo is None:
+    memo = {}
+  if isinstance(expr, (tuple, sympy.Tuple)):
+    return tuple([evaluate_interval(e, bindings, memo) for e in expr])
+  if expr in bindings:
+    return to_interval(bindings[expr])
+  if expr in memo:
+    return memo[expr]
+
+  if not expr.free_symbols:
+    value = float(expr)
+    result = Interval(value) if value.is_integer() else Interval.rounded(value, value)
+  elif isinstance(expr, sympy.Symbol):
+    raise ValueError("No interval bound to %s" % expr)
+  elif isinstance(expr, sympy.Add):
+    result = sum([evaluate_interval(arg, bindings, memo) for arg in expr.args[1:]], evaluate_interval(expr.args[0], bindings, memo))
+  elif isinstance(expr, sympy.Mul):
+    result = evaluate_interval(expr.args[0], bindings, memo)
+    for arg in expr.args[1:]:
+      result = result * evaluate_interval(arg, bindings, memo)
+  elif isinstance(expr, sympy.Pow):
+    base, exponent = expr.args
+    if exponent.free_symbols:
+      result = exp(evaluate_interval(exponent * sympy.log(base), bindings, memo))
+    else:
+      result = evaluate_interval(base, bindings, memo) ** float(exponent)
+  elif isinstance(expr, sympy.Min):
+    result = minimum(*[evaluate_interval(arg, bindings, memo) for arg in expr.args])
+  elif isinstance(expr, sympy.Max):
+    result = maximum(*[evaluate_interval(arg, bindings, memo) for arg in expr.args])
+  elif expr.func in interval_functions:
+    result = interval_functions[expr.func](evaluate_interval(expr.args[0], bindings, memo))
+  else:
+    raise NotImplementedError("No interval rule for %s" % expr.func)
+
+  memo[expr] = result
+  return result
+
+def box(lower, upper):
+  """Interval coordinates of the axis aligned boxes between the corners lower and upper, of shape (3, ...)."""
+  return tuple([Interval(lo, hi) for lo, hi in zip(lower, upper)])
+
+def coordinates(X, Y, Z):
+  return {x: to_interval(X), y: to_interval(Y), z: to_interval(Z)}
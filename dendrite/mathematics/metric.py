@@ -1,9 +1,10 @@
 import numpy as np
-import tensorflow as tf
 from dendrite.mathematics.elementary import sqrt
+from dendrite.utils.tensors import is_tensor
 
 def dot(a, b):
-  if isinstance(a, tf.Tensor):
+  if is_tensor(a):
+    import tensorflow as tf
     if isinstance(b, np.ndarray):
       b = tf.constant(b, dtype=tf.float32)
     with tf.name_scope("Dot"):
@@ -12,7 +13,8 @@ def dot(a, b):
     return np.dot(a, b)
 
 def norm(vector):
-  if isinstance(vector, tf.Tensor):
+  if is_tensor(vector):
+    import tensorflow as tf
     with tf.name_scope("Norm"):
       return tf.sqrt(tf.reduce_sum(tf.square(vector), reduction_indices=0))
   else:
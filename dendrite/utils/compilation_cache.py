@@ -0,0 +1,121 @@
+import os
+import sympy
+import hashlib
+import tempfile
+
+# Compiled artifacts (flattened expressions, generated source, eliminated polynomials) are stored as text files,
+# content-addressed by the structural hash of the Operad they came from plus the backend which produced them.
+# Bump CACHE_FORMAT whenever the way artifacts are stored changes, and CODEGEN_VERSION whenever the artifacts themselves
+# change (flattening, generated NumPy, GLSL or C source), so stale artifacts are never reused.
+CACHE_FORMAT = 1
+CODEGEN_VERSION = 5
+
+default_directory = os.path.join(os.path.expanduser("~"), ".cache", "dendrite")
+default_max_bytes = 512 * 1024**2
+
+def load_expression(text):
+  # Min and Max were built unevaluated, re-evaluating them would be quadratic in their arguments
+  namespace = dict(vars(sympy))
+  namespace["Min"] = lambda *args: sympy.Min(*args, evaluate=False)
+  namespace["Max"] = lambda *args: sympy.Max(*args, evaluate=False)
+  return eval(text, namespace)
+
+def dump_expression(expr):
+  return sympy.srepr(expr)
+
+class CompilationCache:
+  def __init__(self, directory=None, max_bytes=default_max_bytes):
+    # A cache without a directory is disabled, every fetch computes its artifact
+    self.directory = directory
+    self.max_bytes = max_bytes
+    # Running size of the directory, walked once then kept current by this process's writes. Other processes'
+    # writes are only seen at the next walk, which happens whenever the running size passes max_bytes.
+    self.total_bytes = None
+
+  def key(self, *components):
+    components = [CACHE_FORMAT, CODEGEN_VERSION, sympy.__version__] + list(components)
+    return hashlib.sha256("\n".join(map(str, components)).encode("utf-8")).hexdigest()
+
+  def path(self, key):
+    return os.path.join(self.directory, key[:2], key)
+
+  def get(self, key):
+    if self.directory is None:
+      return None
+    path = self.path(key)
+    try:
+      with open(path, "r") as f:
+        text = f.read()
+      # Touch on access, eviction removes the least recently used artifacts first
+      os.utime(path)
+      return text
+    except OSError:
+      return None
+
+  def set(self, key, text):
+    if self.directory is None:
+      return
+    path = self.path(key)
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      # Write then rename, so concurrent processes never read a partial artifact
+      descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+      with os.fdopen(descriptor, "w") as f:
+        f.write(text)
+      os.replace(temporary_path, path)
+      self.track(path)
+    except OSError:
+      # The cache is an optimization only, an unwritable cache directory is not an error
+      pass
+
+  def fetch(self, key, compute, dump=str, load=str):
+    text = self.get(key)
+    if text is not None:
+      return load(text)
+    artifact = compute()
+    self.set(key, dump(artifact))
+    return artifact
+
+  def track(self, path):
+    """Accounts for an artifact just written to path, evicting only when the cache may have outgrown max_bytes."""
+    if self.total_bytes is None:
+      self.evict()
+      return
+    try:
+      self.total_bytes += os.stat(path).st_size
+    except OSError:
+      return
+    if self.total_bytes > self.max_bytes:
+      self.evict()
+
+  def evict(self):
+    entries = []
+    for root, _, files in os.walk(self.directory):
+      for name in files:
+        path = os.path.join(root, name)
+        try:
+          stat = os.stat(path)
+        except OSError:
+          continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum([size for _, size, _ in entries])
+    for _, size, path in sorted(entries):
+      if total <= self.max_bytes:
+        break
+      try:
+        os.remove(path)
+        total -= size
+      except OSError:
+        pass
+    self.total_bytes = total
+
+  def clear(self):
+    max_bytes, self.max_bytes = self.max_bytes, 0
+    self.evict()
+    self.max_bytes = max_bytes
+
+compilation_cache = CompilationCache(
+  os.environ.get("DENDRITE_CACHE_DIR", default_directory) or None,
+  int(os.environ.get("DENDRITE_CACHE_BYTES", default_max_bytes))
+)
@@ -0,0 +1,8 @@
+import sys
+
+# TensorFlow takes seconds to import, so it is only imported once a TensorFlow calculation is constructed.
+# Until then, nothing can be a tensor, and checking for one must not import it.
+
+def is_tensor(obj):
+  tf = sys.modules.get("tensorflow")
+  return tf is not None and isinstance(obj, (tf.Tensor, tf.Variable))
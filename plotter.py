@@ -1,76 +1,72 @@
 import numpy as np
-import tensorflow as tf
 import mcubes
+import json
 import importlib
-import sys
+import argparse
 from dendrite.calculation.graph import *
 from dendrite.calculation.volumetric import *
 from dendrite.calculation.raytracer import *
+from dendrite.export.mesh import transform_vertices, weld, vertex_normals, export_mesh
+from dendrite.export.cli import export_cli
+from dendrite.codegen.glsl_shader import fragment_shader, shader_uniforms
+from dendrite.calculation.animation import Camera
 
 def raytrace(Object):
-  raytracer = Raytracer(Object, debug)
+  raytracer = Raytracer(Object.model, debug, bounds=Object.default_bounds)
   raytracer.run()
 
-def export_to_obj(geometry, resolution, bounds):
-  volumetric = Volumetric(geometry, resolution, bounds, debug)
+def export_to_obj(geometry, resolution, bounds, workers=None, format="obj", welded=False, native=False):
+  volumetric = Volumetric(geometry, resolution, bounds, debug, workers=workers, native=native)
   rendered = volumetric.run()
   vertices, triangles = mcubes.marching_cubes(rendered, 0)
-  shifted = []
-  step_size = [(bounds[1][i] - bounds[0][i]) / resolution[i] for i in [0,1,2]]
-  for vertex in vertices:
-    v_shifted = [((c * step_size[i]) + bounds[0][i]) for i, c in enumerate(vertex)]
-    shifted.append(v_shifted)
+  vertices = transform_vertices(vertices, resolution, bounds)
+  if welded:
+    vertices, triangles = weld(vertices, triangles)
 
-  mcubes.export_obj(shifted, triangles, geometry.name+".obj")
+  normals = vertex_normals(geometry.numeric_functional, vertices) if format != "stl" else None
+  export_mesh(geometry.name+"."+format, vertices, triangles, format, normals)
 
 def export_to_graph_def(geometry):
+  import tensorflow as tf
+
   graph = Graph(geometry, debug)
   graph_def = graph.session.graph.as_graph_def()
   tf.train.write_graph(graph_def, "./", geometry.name + ".pbtxt", True)
 
-def export_to_cli(geometry, resolution, bounds):
-  volumetric = Volumetric(geometry, resolution, bounds, debug)
-  rendered = volumetric.run()[0]
-
-  unit = 0.001 # 0.001mm
-  with open(geometry.name+".cli", "w") as file:
-    file.write("$$HEADERSTART\n")
-    file.write("$$ASCII\n")
-    file.write("$$UNITS/"+str(unit)+"\n")
-    file.write("$$HEADEREND\n")
-    file.write("$$GEOMETRYSTART\n")
-
-    slices = []
-    for i in range(rendered.shape[-1]):
-      contours = measure.find_contours(rendered[:,:,i], 0, fully_connected="high")
-      shifted = []
-      step_size = [(bounds[1][i] - bounds[0][i]) / resolution[i] for i in [0,1]]
-      for connected_component in contours:
-        shifted_component = []
-        for vertex in connected_component:
-          v_shifted = [((c * step_size[i]) - bounds[1][i]) for i, c in enumerate(vertex)]
-          shifted_component.append(v_shifted)
-        shifted.append(shifted_component)
+def export_to_cli(geometry, resolution, bounds, binary=False, workers=None):
+  export_cli(geometry.name+".cli", geometry.numeric_functional, resolution, bounds, binary, workers)
 
-      slices.append(shifted)
+def export_to_glsl(geometry, bounds, resolution=(1920,1080)):
+  # The shader and the uniforms to render the default view with, including the current parameters
+  with open(geometry.name+".frag", "w") as f:
+    f.write(fragment_shader(geometry))
+  uniforms = shader_uniforms(geometry, Camera(), resolution, bounds)
+  with open(geometry.name+".json", "w") as f:
+    json.dump(dict([(k, np.asarray(v).tolist()) for k, v in uniforms.items()]), f, indent=2)
 
-    start_height = bounds[0][2]
-    end_height = bounds[1][2]
-    step_size = (end_height - start_height) / len(slices)
-
-    for i, _slice in enumerate(slices):
-      z_height = start_height + (i*step_size)
-      file.write("$$LAYER/"+str(z_height)+"\n")
-      for j, connected_component in enumerate(_slice):
-        file.write("$$POLYLINE/"+str(j)+",1,"+str(len(connected_component)))
-        for line in connected_component:
-          file.write(","+",".join([str(point) for point in line]))
-        file.write("\n")
-
-    file.write("$$GEOMETRYEND\n")
+def export_to_numpy(geometry):
+  # A module evaluating the model with NumPy alone, parameters default to their current values
+  with open(geometry.name+".py", "w") as f:
+    f.write(geometry.as_numpy_module("field", gradient=True))
 
 if __name__ == "__main__":
-  object_name = sys.argv[1]
-  debug = bool(sys.argv[2] if len(sys.argv) > 2 else False)
-  Object = importlib.import_module("dendrite.models."+object_name)
-  export_to_obj(Object.model, Object.default_resolution, Object.default_bounds)
+  parser = argparse.ArgumentParser(description="Exports a model from dendrite.models")
+  parser.add_argument("object_name")
+  parser.add_argument("debug", nargs="?", default=False, type=bool)
+  parser.add_argument("--format", choices=["obj", "stl", "ply", "cli", "glsl", "py"], default="obj")
+  parser.add_argument("--weld", action="store_true", help="merge coincident vertices")
+  parser.add_argument("--binary", action="store_true", help="write binary rather than ASCII CLI files")
+  parser.add_argument("--workers", type=int, default=None, help="evaluate in parallel tiles over this many processes")
+  parser.add_argument("--native", action="store_true", help="evaluate with compiled C kernels")
+  args = parser.parse_args()
+
+  debug = args.debug
+  Object = importlib.import_module("dendrite.models."+args.object_name)
+  if args.format == "glsl":
+    export_to_glsl(Object.model, Object.default_bounds)
+  elif args.format == "py":
+    export_to_numpy(Object.model)
+  elif args.format == "cli":
+    export_to_cli(Object.model, Object.default_resolution, Object.default_bounds, args.binary, args.workers)
+  else:
+    export_to_obj(Object.model, Object.default_resolution, Object.default_bounds, args.workers, args.format, args.weld, args.native)
@@ -0,0 +1,5 @@
+import os
+
+# Tests never read or write the user's compilation cache, so stale artifacts can't mask failures.
+# Tests of the cache itself use caches in temporary directories
+os.environ["DENDRITE_CACHE_DIR"] = ""
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.calculation.animation import Camera, turntable, FrameWriter
+
+class AnimationTest(TestCase):
+  def test_Rays(self):
+    camera = Camera(position=(0, -2, 0), look_at=(0, 0, 0), fov=90)
+    origins, directions = camera.rays((5, 3))
+    self.assertEqual(origins.shape, (3, 5, 3))
+    self.assertTrue(np.allclose(np.linalg.norm(directions, axis=0), 1))
+    # The central ray looks at the target, the top left ray is up and to the left
+    self.assertTrue(np.allclose(directions[:, 2, 1], [0, 1, 0]))
+    self.assertLess(directions[0, 0, 0], 0)
+    self.assertGreater(directions[2, 0, 0], 0)
+
+  def test_Turntable(self):
+    cameras = list(turntable(4, radius=2, height=1))
+    self.assertEqual(len(cameras), 4)
+    for camera in cameras:
+      self.assertClose(np.linalg.norm(camera.position[:2]), 2)
+      self.assertClose(camera.position[2], 1)
+
+  def test_FrameWriter(self):
+    with tempfile.TemporaryDirectory() as directory:
+      with FrameWriter() as writer:
+        for frame in range(3):
+          writer.write(os.path.join(directory, "%d.png" % frame), np.full((4, 4, 3), frame * 50, dtype=np.uint8))
+      self.assertEqual(sorted(os.listdir(directory)), ["0.png", "1.png", "2.png"])
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.calculation.numpy_raytracer import NumPyRaytracer
+from dendrite.calculation.animation import Camera, turntable, warm_start_depth
+from dendrite.geometry.primitives.quadrics import sphere
+from dendrite.core.functional import Functional
+
+class NumPyRaytracerTest(TestCase):
+  def test_Sphere(self):
+    raytracer = NumPyRaytracer(sphere(0.5), (64, 36))
+    image = raytracer.render()
+    self.assertEqual(image.shape, (36, 64, 3))
+    self.assertTrue(np.array_equal(image[0, 0], raytracer.sky_color))
+    self.assertFalse(np.array_equal(image[18, 32], raytracer.sky_color))
+
+  def test_Compaction(self):
+    raytracer = NumPyRaytracer(sphere(0.5), (64, 36))
+    origins, directions = Camera().rays(raytracer.resolution)
+    t, hit = raytracer.trace(origins.reshape(3, -1), directions.reshape(3, -1))
+    # Only unresolved rays are evaluated on every step
+    self.assertLess(raytracer.evaluations, raytracer.steps * hit.size / 4)
+    points = origins.reshape(3, -1)[:, hit] + directions.reshape(3, -1)[:, hit] * t[hit]
+    self.assertTrue(np.all(np.abs(sphere(0.5)(*points)) < raytracer.epsilon))
+
+  def test_Inside(self):
+    # Inside the solid everywhere, rays march backwards until they pass the clip length
+    solid = Functional(1)
+    solid.lipschitz = 1
+    raytracer = NumPyRaytracer(solid, (8, 6), clip_length=10, max_steps=None)
+    origins, directions = Camera().rays(raytracer.resolution)
+    t, hit = raytracer.trace(origins.reshape(3, -1), directions.reshape(3, -1))
+    self.assertFalse(np.any(hit))
+    self.assertTrue(np.all(t < -10))
+
+  def test_Tiles(self):
+    raytracer = NumPyRaytracer(sphere(0.5), (40, 30))
+    whole = raytracer.render()
+    self.assertTrue(np.array_equal(raytracer.render(tile_shape=(16, 16)), whole))
+    self.assertTrue(np.array_equal(raytracer.render(tile_shape=(16, 16), workers=2), whole))
+
+  def test_WarmStart(self):
+    raytracer = NumPyRaytracer(sphere(0.5), (48, 36), clip_length=10)
+    previous, camera = list(turntable(90, radius=1.2, height=0.3))[:2]
+    raytracer.render(previous)
+    initial = warm_start_depth(previous, raytracer.depth, raytracer.hit, camera, raytracer.resolution)
+
+    raytracer.evaluations = 0
+    cold = raytracer.render(camera)
+    cold_evaluations, cold_depth = raytracer.evaluations, raytracer.depth
+    raytracer.evaluations = 0
+    warm = raytracer.render(camera, initial=initial)
+    # Rays starting short of the surface march fewer steps to the same image
+    self.assertLess(raytracer.evaluations, cold_evaluations)
+    self.assertTrue(np.array_equal(warm, cold))
+    self.assertTrue(np.all(initial[raytracer.hit] <= cold_depth[raytracer.hit]))
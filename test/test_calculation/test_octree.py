@@ -0,0 +1,21 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.calculation.volumetric import Volumetric
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.affine import translate
+
+class OctreeTest(TestCase):
+  def test_MatchesDense(self):
+    functional = sphere(1) | (torus(1, 0.3) << translate(0.5, 0, 0))
+    shape, bounds = (40, 40, 40), [[-2, -2, -2], [2, 2, 2]]
+    volumetric = Volumetric(functional, shape, bounds, adaptive=True)
+    adaptive = volumetric.run()
+
+    grid = np.mgrid[-2:2:40j, -2:2:40j, -2:2:40j]
+    dense = functional(*grid).astype(np.float32)
+    self.assertTrue(np.array_equal(np.sign(adaptive), np.sign(dense)))
+    # Every sample of a cell crossing the surface is exact
+    crossing = np.sign(dense[:-1]) != np.sign(dense[1:])
+    self.assertTrue(np.array_equal(adaptive[:-1][crossing], dense[:-1][crossing]))
+    self.assertLess(volumetric.octree.evaluations, dense.size / 2)
@@ -0,0 +1,22 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.calculation.volumetric import Volumetric
+from dendrite.calculation.parallel import evaluate_parallel
+from dendrite.geometry.primitives.quadrics import sphere, torus
+
+class ParallelTest(TestCase):
+  def test_MatchesDense(self):
+    functional = sphere(1) | torus(1, 0.25)
+    volumetric = Volumetric(functional, (20, 15, 10), [[-2, -2, -2], [2, 2, 2]], chunk_shape=(8, 8, 8), workers=2)
+    dense = functional(*np.mgrid[-2:2:20j, -2:2:15j, -2:2:10j])
+    self.assertTrue(np.allclose(volumetric.run(), dense, atol=1e-6))
+
+  def test_MemoryMapped(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "grid.npy")
+      grid = evaluate_parallel(sphere(1), (10, 10, 10), [[-1, -1, -1], [1, 1, 1]], (4, 4, 4), 2, path)
+      self.assertIsInstance(grid, np.memmap)
+      self.assertClose(np.load(path)[0, 0, 0], sphere(1)(-1, -1, -1))
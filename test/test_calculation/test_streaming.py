@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.calculation.volumetric import Volumetric
+from dendrite.calculation.grid import chunk_slices, chunk_indices
+from dendrite.geometry.primitives.quadrics import sphere
+
+class StreamingTest(TestCase):
+  def test_ChunkSlices(self):
+    covered = np.zeros((10, 7, 5), dtype=int)
+    for chunk in chunk_slices(covered.shape, (4, 4, 4)):
+      covered[chunk] += 1
+    self.assertTrue(np.all(covered == 1))
+
+  def test_PaddedIndices(self):
+    indices = chunk_indices((slice(8, 10), slice(0, 4), slice(4, 5)), (4, 4, 4))
+    self.assertEqual(indices.shape, (3, 4, 4, 4))
+    self.assertEqual(list(indices[0, :, 0, 0]), [8, 9, 9, 9])
+    self.assertEqual(list(indices[2, 0, 0, :]), [4, 4, 4, 4])
+
+  def test_MatchesDense(self):
+    volumetric = Volumetric(sphere(1), (20, 15, 10), [[-2, -2, -2], [2, 2, 2]], chunk_shape=(8, 8, 8), numeric=True)
+    chunks = list(volumetric.stream())
+    self.assertEqual(len(chunks), 3 * 2 * 2)
+    self.assertTrue(all([values.size <= 8**3 for _, values in chunks]))
+
+    dense = sphere(1)(*np.mgrid[-2:2:20j, -2:2:15j, -2:2:10j])
+    self.assertTrue(np.allclose(volumetric.run(), dense, atol=1e-6))
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.core.geometry import Geometry
+from dendrite.calculation.sweep import sweep, metrics
+from dendrite.geometry.primitives.quadrics import sphere
+
+def ball(radius=0.5, factor=1.0):
+  return sphere(radius) * factor
+
+def fixed():
+  return sphere(0.5)
+
+class SweepTest(TestCase):
+  def setUp(self):
+    self.bounds = [[-1, -1, -1], [1, 1, 1]]
+    self.radii = np.linspace(0.2, 0.8, 7)
+
+  def test_Grids(self):
+    configurations = [{"radius": r, "factor": 2.0} for r in self.radii]
+    grids = sweep(Geometry(ball), configurations, (16, 16, 16), self.bounds, batch_size=3)
+    self.assertEqual(grids.shape, (7, 16, 16, 16))
+    X, Y, Z = np.mgrid[-1:1:16j, -1:1:16j, -1:1:16j]
+    for radius, grid in zip(self.radii, grids):
+      self.assertTrue(np.allclose(grid, ball(radius, 2.0)(X, Y, Z), atol=1e-6))
+
+  def test_Metrics(self):
+    results = sweep(Geometry(ball), [{"radius": r} for r in self.radii], (48, 48, 48), self.bounds, metrics=metrics)
+    self.assertTrue(np.allclose(results["volume"], 4 / 3 * np.pi * self.radii ** 3, rtol=0.05))
+    self.assertTrue(np.all(np.diff(results["solid_fraction"]) > 0))
+
+  def test_StructuralParameters(self):
+    with self.assertRaises(ValueError):
+      sweep(Geometry(ball), [{"shape": 1}], (4, 4, 4), self.bounds)
+
+  def test_FixedGeometry(self):
+    # Without exposed parameters every configuration is the same grid
+    grids = sweep(Geometry(fixed), [{}, {}, {}], (8, 8, 8), self.bounds, batch_size=2)
+    expected = sphere(0.5)(*np.mgrid[-1:1:8j, -1:1:8j, -1:1:8j])
+    for grid in grids:
+      self.assertTrue(np.allclose(grid, expected, atol=1e-6))
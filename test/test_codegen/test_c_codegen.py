@@ -0,0 +1,70 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.core.geometry import Geometry
+from dendrite.codegen.glsl_codegen import CodeGenArgumentListError
+from dendrite.codegen.c_codegen import ccodegen, CompiledC
+from dendrite.calculation.volumetric import Volumetric
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.primitives.minimal_surfaces import lidinoid
+from dendrite.transformations.affine import translate
+
+def model(radius=0.5, offset=0.2):
+  return sphere(radius) | (torus(0.6, 0.1) << translate(offset, 0, 0))
+
+@unittest.skipIf(shutil.which(os.environ.get("CC", "cc")) is None, "No C compiler")
+class CCodeGenTest(TestCase):
+  def setUp(self):
+    self.functional = (sphere(1) | (torus(1, 0.3) << translate(0.5, 0, 0))) & lidinoid()
+    self.points = np.random.RandomState(0).uniform(-2, 2, (3, 200))
+    self.bounds = [[-2, -2, -2], [2, 2, 2]]
+
+  def test_Points(self):
+    compiled = self.functional.compiled_c
+    self.assertTrue(np.allclose(compiled(*self.points), self.functional(*self.points)))
+    # Compiling the same source again reuses the library
+    self.assertEqual(CompiledC(self.functional.c_source).path, compiled.path)
+
+  def test_Grid(self):
+    expected = self.functional(*np.mgrid[-2:2:12j, -2:2:10j, -2:2:8j])
+    grid = self.functional.compiled_c.grid((12, 10, 8), self.bounds)
+    self.assertEqual(grid.dtype, np.float32)
+    self.assertTrue(np.allclose(grid, expected, atol=1e-5))
+
+  def test_PrivateLibraries(self):
+    # Without a cache directory, libraries are never loaded from a path other users can write to
+    directory = os.path.dirname(self.functional.compiled_c.path)
+    self.assertNotEqual(directory, tempfile.gettempdir())
+    self.assertEqual(os.stat(directory).st_mode & 0o077, 0)
+
+  def test_Pickle(self):
+    compiled = pickle.loads(pickle.dumps(self.functional.compiled_c))
+    self.assertTrue(np.allclose(compiled(*self.points), self.functional(*self.points)))
+
+  def test_Volumetric(self):
+    expected = Volumetric(self.functional, (16, 16, 16), self.bounds, numeric=True).run()
+    self.assertTrue(np.allclose(Volumetric(self.functional, (16, 16, 16), self.bounds, native=True).run(), expected, atol=1e-5))
+
+  def test_VolumetricOptions(self):
+    with self.assertRaises(ValueError):
+      Volumetric(self.functional, (16, 16, 16), self.bounds, native=True, chunk_shape=(8, 8, 8))
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "grid.npy")
+      Volumetric(self.functional, (16, 16, 16), self.bounds, native=True).run(out=path)
+      expected = self.functional.compiled_c.grid((16, 16, 16), self.bounds)
+      self.assertTrue(np.array_equal(np.load(path), expected))
+
+  def test_Geometry(self):
+    geometry = Geometry(model)
+    geometry.set_parameters(radius=0.7)
+    functional = geometry.numeric_functional
+    self.assertNotIn("radius", functional.c_source)
+    self.assertTrue(np.allclose(functional.compiled_c(*self.points), model(radius=0.7)(*self.points)))
+
+  def test_Arguments(self):
+    with self.assertRaises(CodeGenArgumentListError):
+      ccodegen(sphere(1).flattened.subs("x", "w"))
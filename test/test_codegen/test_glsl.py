@@ -0,0 +1,57 @@
+import re
+import sympy
+import unittest
+from test.utils import *
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.primitives.linear import plane
+from dendrite.geometry.primitives.minimal_surfaces import lidinoid
+from dendrite.transformations.affine import translate, rotate
+from dendrite.geometry.operations.replication import replicate
+from dendrite.geometry.operations.morph import scale
+
+def defined_functions(source):
+  return re.findall(r"^(?:float|vec3) (\w+)\(vec3 p\) \{$", source, re.MULTILINE)
+
+class GLSLTest(TestCase):
+  def test_SharedSubtrees(self):
+    shared = sphere(0.5) << rotate([1, 1, 0], 0.3)
+    tiled = (shared | (shared << translate(1, 0, 0))) & (shared | plane([1, 2, 2], 0))
+    source = tiled.as_glsl()
+    functions = defined_functions(source)
+    # One function per unique subtree, each defined before it is called
+    self.assertEqual(len(functions), len(set(functions)))
+    self.assertEqual(len([f for f in functions if f.startswith("sphere")]), 1)
+    self.assertEqual(len([f for f in functions if f.startswith("rotate")]), 1)
+    self.assertEqual(functions[-1], "field")
+    for function in functions:
+      self.assertNotIn(function + "(p)", source.split(function + "(vec3 p)")[0])
+
+  def test_Composition(self):
+    source = (torus(0.6, 0.1) << translate(0.2, 0, 0)).as_glsl("shape")
+    self.assertIn("vec3 translate_0(vec3 p) {", source)
+    self.assertIn("  return torus_1(translate_0(p));", source)
+    self.assertIn("float shape(vec3 p) {", source)
+
+  def test_Constants(self):
+    source = (sphere(1) * sympy.E).as_glsl()
+    # Constants are defined once, at the top of the module
+    self.assertTrue(source.startswith("#define E 2.71828182845905\n"))
+    # Rationals are printed as float literals, integer division would truncate them
+    source = plane([1, 2, 2], 0).as_glsl()
+    self.assertIn("(1.0/3.0)*(p.x + 2*p.y + 2*p.z)", source)
+    self.assertNotRegex(source, r"\b1/3\b")
+
+  def test_NumericConstants(self):
+    source = scale(replicate(sphere(0.3), [1, 1, 1], [3, 3, 3]), 2).as_glsl()
+    # Numbers are inlined, every function has a valid identifier
+    for function in defined_functions(source):
+      self.assertRegex(function, r"^[a-z]\w*$")
+    self.assertNotRegex(source, r"return \d+;")
+
+  def test_CommonSubexpressions(self):
+    for source in [lidinoid().glsl_code, lidinoid().as_glsl()]:
+      # Repeated terms are evaluated once into typed temporaries
+      self.assertEqual(source.count("2*p.y"), 1)
+      self.assertEqual(source.count("cos(cse0)"), 1)
+      self.assertRegex(source, r"float cse0 = 2\*p\.y;")
+      self.assertLess(source.index("cse1 ="), source.index("return"))
@@ -0,0 +1,51 @@
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+import unittest
+from test.utils import *
+from dendrite.core.geometry import Geometry
+from dendrite.codegen.glsl_shader import fragment_shader, shader_uniforms
+from dendrite.calculation.animation import Camera
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.affine import translate, rotate
+
+def model(radius=0.5, offset=0.2):
+  shared = torus(0.6, 0.1) << rotate([1, 0, 0], 0.5)
+  return sphere(radius) | (shared << translate(offset, 0, 0)) | shared
+
+class ShaderTest(TestCase):
+  def setUp(self):
+    self.geometry = Geometry(model)
+    self.source = fragment_shader(self.geometry)
+
+  def test_Structure(self):
+    self.assertTrue(self.source.startswith("#version 330 core\n"))
+    self.assertEqual(self.source.count("{"), self.source.count("}"))
+    self.assertIn("void main() {", self.source)
+
+    # Every function is defined once, before it is called
+    defined = re.findall(r"^\w+ (\w+)\(.*\) \{$", self.source, re.MULTILINE)
+    self.assertEqual(len(defined), len(set(defined)))
+    for function in defined:
+      definition = self.source.index(" %s(" % function)
+      self.assertNotIn(function + "(", self.source[:definition])
+
+  def test_Uniforms(self):
+    uniforms = shader_uniforms(self.geometry, Camera(), (320, 240))
+    declared = re.findall(r"^uniform \w+ (\w+);$", self.source, re.MULTILINE)
+    self.assertEqual(sorted(declared), sorted(uniforms))
+    self.assertEqual(uniforms["u_radius"], 0.5)
+    self.assertClose(uniforms["u_lipschitz"], 1)
+    self.assertNotIn("pow(p.", self.source)
+
+  @unittest.skipIf(shutil.which("glslangValidator") is None, "glslangValidator is not installed")
+  def test_Compiles(self):
+    with tempfile.TemporaryDirectory() as directory:
+      for name, geometry in [("geometry", self.geometry), ("functional", sphere(0.5) << translate(0.1, 0, 0))]:
+        path = os.path.join(directory, name + ".frag")
+        with open(path, "w") as f:
+          f.write(fragment_shader(geometry))
+        result = subprocess.run(["glslangValidator", path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.assertEqual(result.returncode, 0, result.stdout.decode())
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import subprocess
+import importlib.util
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.core.geometry import Geometry
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.primitives.minimal_surfaces import lidinoid
+from dendrite.transformations.affine import translate
+
+def model(radius=0.5, offset=0.2):
+  return sphere(radius) | (torus(0.6, 0.1) << translate(offset, 0, 0))
+
+def write_module(directory, name, source):
+  path = os.path.join(directory, name + ".py")
+  with open(path, "w") as f:
+    f.write(source)
+  spec = importlib.util.spec_from_file_location(name, path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module
+
+class NumPyModuleTest(TestCase):
+  def setUp(self):
+    self.points = np.random.RandomState(0).uniform(-1, 1, (3, 50))
+    self.directory = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_Functional(self):
+    functional = (sphere(1) | (torus(1, 0.3) << translate(0.5, 0, 0))) & lidinoid()
+    module = write_module(self.directory.name, "lattice", functional.as_numpy_module(gradient=True))
+    self.assertEqual(module.parameters, {})
+    self.assertTrue(np.allclose(module.field(*self.points), functional(*self.points)))
+    self.assertTrue(np.allclose(np.array(module.gradient(*self.points)), functional.gradient(*self.points)))
+
+  def test_Geometry(self):
+    geometry = Geometry(model)
+    geometry.set_parameters(radius=0.7)
+    module = write_module(self.directory.name, "model", geometry.as_numpy_module())
+    self.assertEqual(module.parameters, {"offset": 0.2, "radius": 0.7})
+    self.assertTrue(np.allclose(module.field(*self.points), model(radius=0.7)(*self.points)))
+    self.assertTrue(np.allclose(module.field(*self.points, offset=0.4), model(radius=0.7, offset=0.4)(*self.points)))
+
+  def test_Standalone(self):
+    write_module(self.directory.name, "model", Geometry(model).as_numpy_module())
+    # Importing the module must not need SymPy, TensorFlow or dendrite itself
+    script = "\n".join([
+      "import sys",
+      "for blocked in ['sympy', 'tensorflow', 'dendrite']: sys.modules[blocked] = None",
+      "import model",
+      "print(model.field(0.1, 0.2, 0.3))"
+    ])
+    output = subprocess.check_output([sys.executable, "-c", script], cwd=self.directory.name)
+    self.assertClose(float(output), model()(0.1, 0.2, 0.3))
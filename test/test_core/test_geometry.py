@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.core.geometry import Geometry
+from dendrite.codegen.numpy_codegen import compile_numpy
+from dendrite.calculation.volumetric import Volumetric
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.affine import translate
+
+def model(radius=0.5, factor=2.0, offset=0.2):
+  return (sphere(radius) * factor) | (torus(0.6, 0.1) << translate(offset, 0, 0))
+
+def shaped(shape=sphere(0.5), factor=2.0):
+  return shape * factor
+
+def counted(count=2):
+  # Parameters used as counts need their values
+  return sum([sphere(0.2) << translate(0.3 * i, 0, 0) for i in range(count)], sphere(0.1))
+
+def clamped(radius=0.5):
+  # Parameters compared need their values
+  return sphere(radius if radius < 1 else 1)
+
+def broken(radius=0.5):
+  return sphere(radius) * sum(["2"])
+
+class GeometryTest(TestCase):
+  def setUp(self):
+    self.points = np.random.RandomState(0).uniform(-1, 1, (3, 50))
+
+  def test_Binding(self):
+    geometry = Geometry(model)
+    self.assertTrue(np.allclose(geometry.numeric_functional(*self.points), model()(*self.points)))
+    parametric = geometry.parametric_functional
+
+    geometry.set_parameters(radius=0.7, factor=3.0)
+    functional = geometry.numeric_functional
+    # New values are bound to the same parametric functional, nothing is rebuilt
+    self.assertIs(geometry.parametric_functional, parametric)
+    self.assertTrue(np.allclose(functional(*self.points), model(radius=0.7, factor=3.0)(*self.points)))
+    self.assertClose(functional.lipschitz, 3)
+    self.assertTrue(np.allclose(compile_numpy(functional.numpy_source, "operad")(*self.points), functional(*self.points)))
+
+    interval = functional.interval((0, 0.1), (0, 0.1), (0, 0.1))
+    self.assertTrue(np.all(interval.lo <= functional(0.05, 0.05, 0.05)))
+
+  def test_StructuralParameters(self):
+    geometry = Geometry(shaped)
+    parametric = geometry.parametric_functional
+    geometry.set_parameters(factor=3.0)
+    self.assertIs(geometry.parametric_functional, parametric)
+    # Operads are part of the structure of the functional, which is rebuilt
+    geometry.set_parameters(shape=torus(0.6, 0.1))
+    self.assertIsNot(geometry.parametric_functional, parametric)
+    self.assertTrue(np.allclose(geometry.numeric_functional(*self.points), shaped(torus(0.6, 0.1), 3.0)(*self.points)))
+
+  def test_NumericParameters(self):
+    geometry = Geometry(counted)
+    self.assertIsNone(geometry.parametric_functional)
+    self.assertTrue(np.allclose(geometry.numeric_functional(*self.points), counted()(*self.points)))
+    geometry = Geometry(clamped)
+    self.assertIsNone(geometry.parametric_functional)
+    self.assertTrue(np.allclose(geometry.numeric_functional(*self.points), clamped()(*self.points)))
+    # Errors which are not due to symbolic parameters are raised
+    with self.assertRaises(TypeError):
+      Geometry(broken).parametric_functional
+
+  def test_Volumetric(self):
+    geometry = Geometry(model)
+    volumetric = Volumetric(geometry, (8, 8, 8), [[-1, -1, -1], [1, 1, 1]], numeric=True)
+    volumetric.set_parameters(offset=0.4)
+    expected = Volumetric(model(offset=0.4), (8, 8, 8), [[-1, -1, -1], [1, 1, 1]], numeric=True).run()
+    self.assertTrue(np.allclose(volumetric.run(), expected))
+
+  def test_Uniforms(self):
+    geometry = Geometry(model)
+    source = geometry.as_glsl()
+    for uniform in ["u_radius", "u_factor", "u_offset"]:
+      self.assertIn("uniform float %s;" % uniform, source)
+    self.assertIn("return u_radius - sqrt(", source)
+
+    # New values only change what the uniforms are set to
+    geometry.set_parameters(radius=0.7)
+    self.assertEqual(geometry.as_glsl(), source)
+    manifest = geometry.glsl_manifest()
+    self.assertEqual(manifest["uniforms"]["radius"], {"uniform": "u_radius", "type": "float", "value": 0.7})
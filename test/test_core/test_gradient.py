@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.operations.replication import replicate
+from dendrite.transformations.affine import rotate
+
+def finite_difference(functional, X, Y, Z, h=1e-6):
+  return np.array([
+    functional(X + h, Y, Z) - functional(X - h, Y, Z),
+    functional(X, Y + h, Z) - functional(X, Y - h, Z),
+    functional(X, Y, Z + h) - functional(X, Y, Z - h),
+  ]) / (2 * h)
+
+class GradientTest(TestCase):
+  def test_Sphere(self):
+    points = np.random.uniform(-1, 1, (3, 50))
+    gradient = sphere(1).gradient(*points)
+    self.assertTrue(np.allclose(gradient, -points / np.linalg.norm(points, axis=0)))
+
+  def test_FiniteDifferences(self):
+    points = np.random.uniform(-2, 2, (3, 50))
+    functionals = [
+      (sphere(1) | torus(1, 0.3)) << rotate([1, 0, 1], 0.4),
+      replicate(sphere(0.3), [1, 1, 1], [1, 1, 1]),
+      sphere(1) & ~torus(1, 0.3) * 2,
+    ]
+    for functional in functionals:
+      self.assertTrue(np.allclose(functional.gradient(*points), finite_difference(functional, *points), atol=1e-4))
+
+  def test_Broadcast(self):
+    gradient = (sphere(1) * 0 + 1).gradient(np.zeros(4), 0, 0)
+    self.assertEqual(gradient.shape, (3, 4))
+    self.assertTrue(np.all(gradient == 0))
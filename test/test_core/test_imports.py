@@ -0,0 +1,17 @@
+import sys
+import unittest
+import subprocess
+from test.utils import *
+
+class ImportTest(TestCase):
+  def test_NoTensorFlowOnImport(self):
+    program = (
+      "import sys\n"
+      "from dendrite.geometry.primitives.quadrics import sphere\n"
+      "from dendrite.transformations.affine import translate\n"
+      "import dendrite.calculation.volumetric, dendrite.calculation.raytracer\n"
+      "(sphere(1) << translate(1, 0, 0))(0, 0, 0)\n"
+      "print('tensorflow' in sys.modules)\n"
+    )
+    output = subprocess.check_output([sys.executable, "-c", program])
+    self.assertEqual(output.decode("utf-8").strip(), "False")
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.geometry.primitives.quadrics import sphere, torus, ellipsoid
+from dendrite.geometry.primitives.linear import plane
+from dendrite.geometry.primitives.polygons import regular_polygon
+from dendrite.geometry.operations.morph import scale
+from dendrite.geometry.operations.replication import replicate
+from dendrite.transformations.affine import translate, rotate
+from dendrite.geometry.primitives.minimal_surfaces import gyroid
+from dendrite.core.lipschitz import estimate_lipschitz
+from dendrite.calculation.numpy_raytracer import NumPyRaytracer
+
+def gradient_norms(functional, points, h=1e-5):
+  X, Y, Z = points
+  gradient = [
+    (functional(X + h, Y, Z) - functional(X - h, Y, Z)) / (2 * h),
+    (functional(X, Y + h, Z) - functional(X, Y - h, Z)) / (2 * h),
+    (functional(X, Y, Z + h) - functional(X, Y, Z - h)) / (2 * h),
+  ]
+  return np.sqrt(np.sum(np.square(gradient), axis=0))
+
+class LipschitzTest(TestCase):
+  def test_DistanceFields(self):
+    for functional in [sphere(1), torus(1, 0.5), plane([1, 2, 2], 0), regular_polygon(1, 6)]:
+      self.assertClose(functional.lipschitz, 1)
+
+  def test_Propagation(self):
+    self.assertClose((sphere(1) << rotate([1, 1, 0], 0.3)).lipschitz, 1)
+    self.assertClose((sphere(1) << translate(1, 2, 3)).lipschitz, 1)
+    self.assertClose((sphere(1) * 3).lipschitz, 3)
+    self.assertClose(scale(torus(1, 0.5), 3).lipschitz, 1)
+    self.assertClose((sphere(1) | plane([0, 0, 1], 0) * 2).lipschitz, 2)
+
+  def test_Bounds(self):
+    points = np.random.uniform(-2, 2, (3, 200))
+    for functional in [torus(1, 0.5) << rotate([0, 1, 1], 1), scale(sphere(1) & torus(1, 0.5), 0.5), sphere(1) * 2 | torus(1, 0.2)]:
+      self.assertTrue(np.all(gradient_norms(functional, points) <= functional.lipschitz + 1e-4))
+
+  def test_Override(self):
+    functional = ellipsoid(1, 2, 3)
+    functional.lipschitz = 4
+    self.assertEqual(functional.lipschitz, 4)
+    self.assertEqual((functional << translate(1, 0, 0)).lipschitz, 4)
+
+  def test_Unknown(self):
+    # Nodes without a rule are unbounded, never assumed to be distance fields
+    for functional in [gyroid(), ellipsoid(1, 2, 3), sphere(1) | gyroid()]:
+      self.assertEqual(functional.lipschitz, np.inf)
+    # Discontinuous functions have no bound across their jumps
+    self.assertEqual(replicate(sphere(0.3), [1, 1, 1], [2, 2, 2]).lipschitz, np.inf)
+
+    with self.assertRaises(ValueError):
+      NumPyRaytracer(gyroid(), (8, 8), strict=True)
+    # Otherwise a bound is estimated within the render bounds
+    with self.assertWarns(UserWarning):
+      raytracer = NumPyRaytracer(gyroid(), (8, 8), bounds=[[-4, -4, -4], [4, 4, 4]])
+    self.assertClose(raytracer.lipschitz, estimate_lipschitz(gyroid(), [[-4, -4, -4], [4, 4, 4]]))
+
+  def test_Estimate(self):
+    functional = gyroid()
+    points = np.random.uniform(-4, 4, (3, 200))
+    functional.lipschitz = estimate_lipschitz(functional, [[-4, -4, -4], [4, 4, 4]])
+    self.assertTrue(np.all(gradient_norms(functional, points) <= functional.lipschitz))
+    self.assertLess(functional.lipschitz, 2 * np.sqrt(3) + 1e-6)
+    NumPyRaytracer(functional, (8, 8))
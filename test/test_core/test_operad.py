@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.affine import translate, rotate
+from dendrite.geometry.primitives.linear import plane
+from dendrite.codegen.numpy_codegen import numpycodegen, compile_numpy
+
+class OperadTest(TestCase):
+  def test_StructuralHash(self):
+    self.assertEqual(sphere(1).structural_hash, sphere(1).structural_hash)
+    self.assertNotEqual(sphere(1).structural_hash, sphere(2).structural_hash)
+    self.assertNotEqual(sphere(1).structural_hash, torus(1, 1).structural_hash)
+    self.assertEqual(translate(0,0,1).structural_hash, translate(0,0,1).structural_hash)
+
+  def test_SharedSubtrees(self):
+    u = (sphere(1) | torus(1, 0.5)) & (sphere(1) | torus(1, 0.5))
+    memo = {}
+    u.substitute_symbols(memo)
+    # intersection, union, sphere and torus; the repeated union is substituted once
+    self.assertEqual(len(memo), 4)
+
+  def test_NumpySourceSharesSubtrees(self):
+    shared = torus(1, 0.3) << rotate([1, 1, 0], 0.3)
+    u = (shared | sphere(1)) & (shared // plane([0, 0, 1], 0))
+    # 0.977668... only occurs inside the rotated torus, which the flattened tree repeats
+    constant = "0.977668244562803"
+    plain = numpycodegen(("operad", u.flattened))
+    self.assertEqual(plain.count(constant), 2)
+    self.assertEqual(u.numpy_source.count(constant), 1)
+    points = np.random.RandomState(0).uniform(-2, 2, (3, 1000))
+    difference = u.numpy_lambda(*points) - compile_numpy(plain, "operad")(*points)
+    self.assertClose(np.max(np.abs(difference)), 0)
@@ -0,0 +1,53 @@
+import os
+import struct
+import tempfile
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.export.cli import slice_layers, export_cli
+from dendrite.geometry.primitives.quadrics import sphere
+
+bounds = [[-1.5, -1.5, -1.5], [1.5, 1.5, 1.5]]
+
+class CLITest(TestCase):
+  def test_Contours(self):
+    for height, contours in slice_layers(sphere(1), (60, 60, 5), bounds):
+      radius = np.sqrt(max(0, 1 - height**2))
+      self.assertEqual(len(contours), 1 if radius > 0 else 0)
+      for contour in contours:
+        self.assertLess(np.max(np.abs(np.linalg.norm(contour, axis=1) - radius)), 0.02)
+
+  def test_Parallel(self):
+    serial = list(slice_layers(sphere(1), (30, 30, 4), bounds))
+    parallel = list(slice_layers(sphere(1), (30, 30, 4), bounds, workers=2))
+    for (h1, c1), (h2, c2) in zip(serial, parallel):
+      self.assertEqual(h1, h2)
+      self.assertTrue(all([np.allclose(a, b) for a, b in zip(c1, c2)]))
+
+  def test_ASCII(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "sphere.cli")
+      export_cli(path, sphere(1), (30, 30, 5), bounds)
+      with open(path) as f:
+        lines = f.read().splitlines()
+      self.assertEqual(lines[1], "$$ASCII")
+      self.assertEqual(len([l for l in lines if l.startswith("$$LAYER/")]), 5)
+      polyline = [l for l in lines if l.startswith("$$POLYLINE/")][0]
+      values = polyline[len("$$POLYLINE/"):].split(",")
+      self.assertEqual(len(values), 3 + 2 * int(values[2]))
+
+  def test_Binary(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "sphere.cli")
+      export_cli(path, sphere(1), (30, 30, 3), bounds, binary=True)
+      with open(path, "rb") as f:
+        header, body = f.read().split(b"$$HEADEREND\n")
+      self.assertIn(b"$$BINARY", header)
+      command, height = struct.unpack("<Hf", body[:6])
+      self.assertEqual((command, height), (127, -1.5))
+      # The bottom layer lies below the sphere, the middle layer has a single polyline
+      command, height = struct.unpack("<Hf", body[6:12])
+      self.assertEqual((command, height), (127, 0))
+      command, identifier, direction, count = struct.unpack("<Hiii", body[12:26])
+      self.assertEqual(command, 130)
+      self.assertEqual(len(body), 3 * 6 + 14 + 8 * count)
@@ -0,0 +1,60 @@
+import os
+import struct
+import tempfile
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.export.mesh import transform_vertices, weld, write_stl, write_ply, write_obj, vertex_normals
+from dendrite.geometry.primitives.quadrics import sphere
+
+vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 0]], dtype=np.float64)
+triangles = np.array([[0, 1, 2], [0, 3, 4], [1, 4, 2]])
+
+class MeshTest(TestCase):
+  def test_TransformVertices(self):
+    resolution, bounds = (10, 20, 40), [[-1, -2, -3], [1, 2, 3]]
+    transformed = transform_vertices(vertices, resolution, bounds)
+    step_size = [(bounds[1][i] - bounds[0][i]) / resolution[i] for i in [0,1,2]]
+    for vertex, expected in zip(transformed, vertices):
+      self.assertTrue(np.allclose(vertex, [(c * step_size[i]) + bounds[0][i] for i, c in enumerate(expected)]))
+
+  def test_Weld(self):
+    welded_vertices, welded_triangles = weld(vertices, triangles)
+    self.assertEqual(len(welded_vertices), 4)
+    # The last triangle references the duplicated vertex twice and degenerates
+    self.assertEqual(len(welded_triangles), 2)
+    self.assertTrue(np.allclose(welded_vertices[welded_triangles], vertices[triangles[:2]]))
+
+  def test_STL(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "mesh.stl")
+      write_stl(path, vertices, triangles)
+      with open(path, "rb") as f:
+        data = f.read()
+      self.assertEqual(len(data), 84 + 50 * len(triangles))
+      self.assertEqual(struct.unpack("<I", data[80:84])[0], len(triangles))
+      normal = struct.unpack("<3f", data[84:96])
+      self.assertTrue(np.allclose(normal, [0, 0, 1]))
+
+  def test_PLY(self):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "mesh.ply")
+      write_ply(path, vertices, triangles)
+      with open(path, "rb") as f:
+        data = f.read()
+      header, body = data.split(b"end_header\n")
+      self.assertIn(b"element vertex 5", header)
+      self.assertIn(b"element face 3", header)
+      self.assertEqual(len(body), 12 * len(vertices) + 13 * len(triangles))
+
+  def test_Normals(self):
+    points = np.array([[2.0, 0, 0], [0, 0, -3.0]])
+    self.assertTrue(np.allclose(vertex_normals(sphere(1), points), [[1, 0, 0], [0, 0, -1]]))
+
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, "mesh.obj")
+      write_obj(path, vertices, triangles, vertex_normals(sphere(1), vertices + 1))
+      with open(path) as f:
+        lines = f.read().splitlines()
+      self.assertEqual(len([l for l in lines if l.startswith("vn ")]), len(vertices))
+      self.assertIn("f 1//1 2//2 3//3", lines)
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.mathematics.interval import Interval, box
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.geometry.primitives.minimal_surfaces import gyroid
+from dendrite.transformations.affine import translate, rotate
+from dendrite.transformations.periodic import saw_wave
+
+def random_boxes(num, size):
+  lower = np.random.uniform(-2, 2, (3, num))
+  return lower, lower + np.random.uniform(0, size, (3, num))
+
+def samples_within(lower, upper, num):
+  fractions = np.random.uniform(0, 1, (num, 3, 1))
+  return lower + fractions * (upper - lower)
+
+class IntervalTest(TestCase):
+  def test_Arithmetic(self):
+    a, b = Interval(-1, 2), Interval(3, 4)
+    product = a * b
+    self.assertLessEqual(product.lo, -4)
+    self.assertGreaterEqual(product.hi, 8)
+    square = a ** 2
+    self.assertEqual(square.lo, 0)
+    self.assertGreaterEqual(square.hi, 4)
+    quotient = b / a
+    self.assertEqual(quotient.lo, -np.inf)
+    self.assertEqual(quotient.hi, np.inf)
+
+  def test_Enclosure(self):
+    functionals = [
+      sphere(1),
+      torus(1, 0.25) << rotate([1, 0, 0], 0.5),
+      (sphere(1) | (sphere(0.5) << translate(1, 0, 0))) & torus(1, 0.5),
+      gyroid(),
+      sphere(0.4) << saw_wave([1, 1, 1], [1, 1, 1]),
+    ]
+    lower, upper = random_boxes(50, 0.5)
+    for functional in functionals:
+      bounds = functional.interval(*box(lower, upper))
+      for point in samples_within(lower, upper, 20):
+        values = functional(*[c.astype(np.float64) for c in point])
+        self.assertTrue(np.all(bounds.contains(values)), functional)
+
+  def test_Culling(self):
+    # Boxes far from the surface of the sphere can not contain it
+    bounds = sphere(1).interval((2, 3), (2, 3), (2, 3))
+    self.assertFalse(bounds.contains(0))
+    bounds = sphere(1).interval((0.5, 1.5), (-0.1, 0.1), (-0.1, 0.1))
+    self.assertTrue(bounds.contains(0))
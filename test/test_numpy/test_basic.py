@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from test.utils import *
+from dendrite.geometry.primitives.quadrics import sphere, torus
+from dendrite.transformations.domain import scale_inputs
+
+class NumPyTest(TestCase):
+  def test_DistanceField(self):
+    s = sphere(1)
+    X, Y, Z = np.array(sample_points(50)).T
+    evaluated = s(X, Y, Z)
+    self.assertEqual(evaluated.shape, X.shape)
+    for i, point in enumerate(zip(X, Y, Z)):
+      self.assertClose(evaluated[i], 1 - np.linalg.norm(point))
+
+  def test_Dtype(self):
+    t = torus(1, 0.5)
+    grid = np.mgrid[-1:1:10j, -1:1:10j, -1:1:10j].astype(np.float32)
+    evaluated = t(*grid)
+    self.assertEqual(evaluated.dtype, np.float32)
+    self.assertEqual(evaluated.shape, (10, 10, 10))
+    self.assertAlmostEqual(float(t(np.zeros(1), 0, 0)[0]), -0.5)
+
+  def test_Compiled_once(self):
+    s = sphere(2)
+    s(np.zeros(3), np.zeros(3), np.zeros(3))
+    compiled = s.numpy_lambda
+    s(np.ones(3), np.ones(3), np.ones(3))
+    self.assertIs(compiled, s.numpy_lambda)
+
+  def test_Transformation(self):
+    gx, gy, gz = scale_inputs(2, 4, 8)(np.ones(4), np.ones(4), np.ones(4))
+    self.assertTrue(np.allclose(gx, 0.5))
+    self.assertTrue(np.allclose(gy, 0.25))
+    self.assertTrue(np.allclose(gz, 0.125))
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from unittest import mock
+from sympy.abc import x, y
+from test.utils import *
+from dendrite.utils.compilation_cache import CompilationCache, dump_expression, load_expression
+from dendrite.geometry.primitives.quadrics import sphere
+from dendrite.mathematics.elementary import Max
+
+class CompilationCacheTest(TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.cache = CompilationCache(self.directory)
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def test_Fetch(self):
+    computed = []
+    compute = lambda: computed.append(1) or "artifact"
+    key = self.cache.key("hash", "numpy")
+    self.assertEqual(self.cache.fetch(key, compute), "artifact")
+    self.assertEqual(self.cache.fetch(key, compute), "artifact")
+    self.assertEqual(len(computed), 1)
+    self.assertNotEqual(key, self.cache.key("hash", "glsl"))
+
+  def test_Codegen_version(self):
+    key = self.cache.key("hash", "numpy")
+    with mock.patch("dendrite.utils.compilation_cache.CODEGEN_VERSION", -1):
+      self.assertNotEqual(self.cache.key("hash", "numpy"), key)
+
+  def test_Expressions(self):
+    expr = Max(x**2, y + 1)
+    self.assertEqual(load_expression(dump_expression(expr)), expr)
+
+  def test_Eviction(self):
+    self.cache.max_bytes = 25
+    for i in range(5):
+      key = self.cache.key(i)
+      self.cache.set(key, "0123456789")
+      os.utime(self.cache.path(key), (i, i))
+    self.cache.evict()
+    self.assertIsNone(self.cache.get(self.cache.key(0)))
+    self.assertIsNone(self.cache.get(self.cache.key(2)))
+    self.assertEqual(self.cache.get(self.cache.key(3)), "0123456789")
+    self.assertEqual(self.cache.get(self.cache.key(4)), "0123456789")
+
+  def test_Writes_skip_walk_under_limit(self):
+    self.cache.max_bytes = 25
+    self.cache.set(self.cache.key(0), "0123456789")
+    os.utime(self.cache.path(self.cache.key(0)), (0, 0))
+    with mock.patch("os.walk", side_effect=AssertionError):
+      self.cache.set(self.cache.key(1), "0123456789")
+    self.assertEqual(self.cache.total_bytes, 20)
+    self.cache.set(self.cache.key(2), "0123456789")
+    self.assertEqual(self.cache.total_bytes, 20)
+    self.assertIsNone(self.cache.get(self.cache.key(0)))
+
+  def test_Warm_cache_skips_flattening(self):
+    with mock.patch("dendrite.core.operad.compilation_cache", self.cache):
+      sphere(1)(np.zeros(2), np.zeros(2), np.zeros(2))
+      s = sphere(1)
+      with mock.patch.object(type(s), "substitute_symbols", side_effect=AssertionError):
+        self.assertTrue(np.allclose(s(np.zeros(2), np.ones(2), np.zeros(2)), 0))